@@ -1,10 +1,21 @@
-from flask import Flask, session, redirect, url_for, request
-from routes import auth, profile, books, settings, admin, librarian, user_library
+import os
+
+from flask import Flask, session, redirect, url_for, request, flash
+from routes import auth, profile, books, settings, admin, librarian, user_library, metrics
+from dbconnections.dbconnections import init_pools
+from services import autocomplete, static_assets
 
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey"  # change to env var in production
 
+# Requests larger than this are rejected with 413 before the body is read
+MAX_UPLOAD_MB = int(os.environ.get("MAX_UPLOAD_MB", 50))
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
+
+# Fingerprinted, precompressed static files (python -m commands.build_static)
+static_assets.init_app(app)
+
 # Register Blueprints
 app.register_blueprint(auth.bp)
 app.register_blueprint(profile.bp)
@@ -13,6 +24,13 @@ app.register_blueprint(settings.bp)
 app.register_blueprint(admin.bp)
 app.register_blueprint(librarian.bp)
 app.register_blueprint(user_library.bp)
+app.register_blueprint(metrics.bp)
+
+# Create the local/remote connection pools once at startup
+init_pools()
+
+# Build the search box suggestions in the background
+autocomplete.start()
 
 # ----------------------
 # PROTECT ROUTES
@@ -25,6 +43,7 @@ def require_login():
         "auth.register",
         "profile.profile_image",
         "admin.admin_login",
+        "metrics.export",
         "static",
         None
     }
@@ -33,5 +52,11 @@ def require_login():
     if "user_id" not in session and request.endpoint not in allowed:
         return redirect(url_for("auth.login"))
 
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    flash(f"Upload too large. The maximum size is {MAX_UPLOAD_MB} MB.", "error")
+    return redirect(request.url)
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,110 @@
+"""
+ASGI entry point serving the catalog as JSON through the async data path.
+
+    uvicorn asgi:app --workers 2
+
+Endpoints (signed in through the Flask app; its session cookie is accepted here):
+    GET /api/books?db_source=all&filter=title&keyword=...&sort=title&page=...&page_size=50
+                  [&university=...&department=...&year=...]
+    GET /api/library
+    GET /api/remote-library
+"""
+import json
+from http.cookies import SimpleCookie
+from itertools import islice
+from urllib.parse import parse_qs
+
+from flask.sessions import SecureCookieSessionInterface
+
+from app import app as flask_app
+from dbconnections.async_db import init_async_pools, close_async_pools
+from routes.books import ALLOWED_SORT, RANKED_SEARCHES, page_key
+from services import async_catalog, facets
+from services.catalog import json_default
+from services.pagination import page_size, decode_token, build_page
+
+_session_serializer = SecureCookieSessionInterface().get_signing_serializer(flask_app)
+
+
+def _session(scope):
+    cookies = SimpleCookie()
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies.load(value.decode("latin-1"))
+    morsel = cookies.get(flask_app.config["SESSION_COOKIE_NAME"])
+    if morsel is None:
+        return {}
+    try:
+        return _session_serializer.loads(morsel.value)
+    except Exception:
+        return {}
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload, default=json_default).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _books(args):
+    db_source = args.get("db_source", "local")
+    search_type = args.get("filter")
+    keyword = args.get("keyword")
+    sort_col = args.get("sort") if args.get("sort") in ALLOWED_SORT else "book_id"
+    size = page_size(args)
+    position = decode_token(args.get("page"))
+
+    chosen = facets.selected(args)
+
+    sources = ["local", "remote"] if db_source == "all" else [db_source if db_source == "remote" else "local"]
+    if search_type in RANKED_SEARCHES and keyword:
+        # Ranked searches show the best page_size matches and have no further pages, as in books.index
+        merged, errors = await async_catalog.federated_query_async(
+            sources, search_type=search_type, keyword=keyword, limit=size
+        )
+        rows, next_token, prev_token = list(islice(merged, size)), None, None
+    else:
+        merged, errors = await async_catalog.federated_query_async(
+            sources, search_type=search_type, keyword=keyword, sort=sort_col, position=position, limit=size + 1,
+            chosen=chosen
+        )
+        rows, next_token, prev_token = build_page(list(islice(merged, size + 1)), size, position,
+                                                  page_key(sort_col))
+    return {"books": rows, "next": next_token, "prev": prev_token, "errors": errors}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await init_async_pools()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_async_pools()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    user_id = _session(scope).get("user_id")
+    if user_id is None:
+        return await _send_json(send, 401, {"error": "login required"})
+
+    args = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    path = scope["path"]
+
+    if path == "/api/books":
+        return await _send_json(send, 200, await _books(args))
+    if path == "/api/library":
+        local_books, remote_books = await async_catalog.my_library_async(user_id)
+        return await _send_json(send, 200, {"local": local_books, "remote": remote_books})
+    if path == "/api/remote-library":
+        remote_books, missing = await async_catalog.remote_library_async(user_id)
+        return await _send_json(send, 200, {"remote": remote_books, "missing": missing})
+    return await _send_json(send, 404, {"error": "not found"})
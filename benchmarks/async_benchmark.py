@@ -0,0 +1,180 @@
+"""
+Requests per second: threaded federated search vs the asyncio path.
+
+"threaded" runs --concurrency client threads, each calling
+books.federated_query (as Flask worker threads do); "async" runs the same
+number of concurrent tasks calling async_catalog.federated_query_async on
+one event loop. Both search db_source=all.
+
+By default the databases are simulated: every round trip sleeps --latency
+ms, which is what dominates on a real network. --live uses the configured
+Oracle databases instead.
+
+Usage:
+    python -m benchmarks.async_benchmark [--requests 400] [--concurrency 32] [--latency 20]
+    python -m benchmarks.async_benchmark --live
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+from routes import books
+from services import async_catalog, remote_mirror
+
+ROWS = [(i, f"Title {i}", "Author", "University", "Department", 2020) for i in range(1, 51)]
+
+
+class _SimulatedCursor:
+    """Sync cursor: every execute is one round trip, answered with ROWS."""
+    rowfactory = None
+    arraysize = prefetchrows = 100
+
+    def __init__(self, latency):
+        self.latency = latency
+        self._pending = []
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def execute(self, sql, params=None):
+        time.sleep(self.latency)
+        self.rowfactory = None
+        self._pending = list(ROWS)
+
+    def _take(self, count):
+        rows, self._pending = self._pending[:count], self._pending[count:]
+        return [self.rowfactory(*row) for row in rows] if self.rowfactory else rows
+
+    def fetchone(self):
+        rows = self._take(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=None):
+        return self._take(size or self.arraysize)
+
+    def fetchall(self):
+        return self._take(len(self._pending))
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+
+class _SimulatedAsyncCursor(_SimulatedCursor):
+    """The same cursor with python-oracledb's async execute and fetch methods."""
+
+    async def execute(self, sql, params=None):
+        await asyncio.sleep(self.latency)
+        self.rowfactory = None
+        self._pending = list(ROWS)
+
+    async def fetchone(self):
+        return _SimulatedCursor.fetchone(self)
+
+    async def fetchmany(self, size=None):
+        return _SimulatedCursor.fetchmany(self, size)
+
+    async def fetchall(self):
+        return _SimulatedCursor.fetchall(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class _SimulatedConnection:
+    call_timeout = 0
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def simulate(latency):
+    @contextmanager
+    def connection(source="local"):
+        yield _SimulatedConnection(_SimulatedCursor(latency))
+
+    @asynccontextmanager
+    async def async_connection(source="local"):
+        yield _SimulatedConnection(_SimulatedAsyncCursor(latency))
+
+    books.connection = connection
+    async_catalog.async_connection = async_connection
+    # Both paths query the remote source itself, not the local mirror
+    remote_mirror.MAX_AGE = 0
+
+
+def _search():
+    return dict(search_type="title", keyword="data", sort="title", limit=51)
+
+
+def _summary(outcomes, elapsed):
+    """(req/s, rows returned, {source: first error}) for a list of federated query results."""
+    rows, errors = 0, {}
+    for merged, failed in outcomes:
+        rows += len(list(merged))
+        for source, error in failed.items():
+            errors.setdefault(source, error)
+    return len(outcomes) / elapsed, rows, errors
+
+
+def run_threaded(requests, concurrency):
+    def one(_):
+        return books.federated_query(["local", "remote"], **_search())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(requests)))
+    return _summary(outcomes, time.perf_counter() - started)
+
+
+async def run_async(requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await async_catalog.federated_query_async(["local", "remote"], **_search())
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(one() for _ in range(requests)))
+    return _summary(outcomes, time.perf_counter() - started)
+
+
+def report(label, summary):
+    """Print one result line; returns False when a search failed or nothing came back."""
+    rate, rows, errors = summary
+    print(f"{label:<9} {rate:8.1f} req/s  {rows} rows")
+    for source, error in errors.items():
+        print(f"  {source}: {error}")
+    return rows > 0 and not errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare threaded and asyncio catalog search throughput.")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--latency", type=float, default=20, help="simulated ms per round trip")
+    parser.add_argument("--live", action="store_true", help="use the configured Oracle databases")
+    args = parser.parse_args()
+
+    if not args.live:
+        simulate(args.latency / 1000)
+
+    label = "live" if args.live else f"simulated {args.latency:g} ms/round trip"
+    print(f"{args.requests} federated searches, {args.concurrency} concurrent clients, {label}")
+    print(f"federated pool: {books._executor._max_workers} workers")
+    ok = report("threaded", run_threaded(args.requests, args.concurrency))
+    ok = report("async", asyncio.run(run_async(args.requests, args.concurrency))) and ok
+    if not ok:
+        # A rate measured over failed or empty searches means nothing
+        sys.exit("Searches failed or returned no rows; the figures above are not valid")
@@ -0,0 +1,92 @@
+"""
+Memory footprint and lookup latency of the autocomplete prefix index.
+
+Builds services.autocomplete.PrefixIndex from generated catalog rows (unique
+titles, a few thousand authors, 40 universities, 25 departments) and
+reports the memory the index retains, including its strings, plus the
+latency of prefix lookups of 1-4 characters.
+
+Usage:
+    python -m benchmarks.autocomplete_memory [--sizes 100000,1000000] [--lookups 10000]
+                                             [--output autocomplete-memory.json]
+"""
+import argparse
+import gc
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.suite import WORDS, git_commit
+from services.autocomplete import FIELDS, PrefixIndex
+
+
+def rows(size, seed=1):
+    rng = random.Random(seed)
+    for n in range(size):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 7))).capitalize()
+        yield (f"{title} {n}", f"Author {rng.randrange(5000)}", f"University {rng.randrange(40)}",
+               f"Department {rng.randrange(25)}")
+
+
+def measure(size, lookups):
+    # Built twice: tracemalloc slows the build down several times
+    gc.collect()
+    tracemalloc.start()
+    traced = PrefixIndex(rows(size))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+
+    gc.collect()
+    start = time.perf_counter()
+    index = PrefixIndex(rows(size))
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(2)
+    timings = []
+    for _ in range(lookups):
+        field = rng.choice(FIELDS)
+        value = rng.choice(index.values[field])
+        prefix = value[:rng.randrange(1, 5)]
+        start = time.perf_counter()
+        index.complete(field, prefix, 10)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+
+    return {
+        "titles": size,
+        "retained_mb": round(retained / 2 ** 20, 1),
+        "peak_mb": round(peak / 2 ** 20, 1),
+        "bytes_per_title": round(retained / size, 1),
+        "build_s": round(build_seconds, 2),
+        "lookup_median_us": round(statistics.median(timings), 1),
+        "lookup_p99_us": round(timings[int(len(timings) * 0.99)], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autocomplete prefix index memory and lookup benchmark.")
+    parser.add_argument("--sizes", default="100000,1000000", help="comma-separated title counts")
+    parser.add_argument("--lookups", type=int, default=10000, help="timed prefix lookups per size")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = measure(size, args.lookups)
+        results.append(result)
+        print(f"{size:>9} titles  {result['retained_mb']:7.1f} MB retained ({result['bytes_per_title']:.0f} B/title), "
+              f"peak {result['peak_mb']:7.1f} MB, built in {result['build_s']:.2f}s, "
+              f"lookup median {result['lookup_median_us']:.1f} us / p99 {result['lookup_p99_us']:.1f} us")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "results": results}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+SQLite-backed stand-in for the parts of python-oracledb the app uses.
+
+Point the app at it before importing anything from dbconnections:
+
+    DB_DRIVER=benchmarks.fake_oracle
+    DB_DSN=file:bench_local?mode=memory&cache=shared
+    REMOTE_DB_DSN=file:bench_remote?mode=memory&cache=shared
+
+A DSN is a SQLite URI, so the databases live in memory for as long as the
+process keeps one connection to them. DB links (table@remote_uni) resolve
+through LINKS, mapping the link name to a DSN.
+
+Statements are rewritten just enough for the app's SQL (FETCH FIRST, :1 binds,
+TO_CHAR, NVL, db links). Every round trip the real driver would make sleeps
+LATENCY_MS: connect, execute (including its first `prefetchrows` rows), one
+fetch per `arraysize` rows after that, commit/rollback and each LOB call.
+BLOB columns come back as Lob objects. RETURNING ... INTO is not supported.
+
+DSNs in UNREACHABLE behave like a host that doesn't answer: connects wait
+tcp_connect_timeout and statements wait call_timeout (on that database or
+over its DB link), then fail with the driver's error codes.
+
+`statements` counts executions per distinct SQL text, which is what the
+shared pool would have to hard-parse; it is only cleared by clear_statements().
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+from oracledb import (DB_TYPE_BLOB, DB_TYPE_NUMBER, POOL_GETMODE_TIMEDWAIT,  # noqa: F401 (re-exported)
+                      POOL_GETMODE_WAIT, DatabaseError, Error, IntegrityError, OperationalError)
+
+LATENCY_MS = float(os.environ.get("FAKE_ORACLE_LATENCY_MS", 0))
+LINKS = {"remote_uni": os.environ.get("REMOTE_DB_DSN", "file:bench_remote?mode=memory&cache=shared")}
+
+UNREACHABLE = set()
+NO_ANSWER_TIMEOUT = 20.0   # seconds a call to an unreachable host waits without a timeout set
+
+stats = {"round_trips": 0, "connects": 0}
+statements = Counter()
+_stats_lock = threading.Lock()
+_keepalive = {}
+
+
+def _round_trip():
+    with _stats_lock:
+        stats["round_trips"] += 1
+    if LATENCY_MS:
+        time.sleep(LATENCY_MS / 1000)
+
+
+def reset_stats():
+    with _stats_lock:
+        stats.update(round_trips=0, connects=0)
+
+
+def _record_statement(sql):
+    with _stats_lock:
+        statements[sql] += 1
+
+
+def clear_statements():
+    with _stats_lock:
+        statements.clear()
+
+
+# ---------------------------
+# SQL translation
+# ---------------------------
+_REWRITES = [
+    (re.compile(r"FETCH\s+FIRST\s+(:\w+|\d+)\s+ROWS\s+ONLY", re.I), r"LIMIT \1"),
+    (re.compile(r"TO_CHAR\(([\w.]+)\)", re.I), r"CAST(\1 AS TEXT)"),
+    (re.compile(r"\bNVL\(", re.I), "IFNULL("),
+    (re.compile(r"\bSYSTIMESTAMP\b|\bSYSDATE\b", re.I), "CURRENT_TIMESTAMP"),
+    (re.compile(r"DBMS_LOB\.GETLENGTH\(", re.I), "LENGTH("),
+    (re.compile(r"(\w+)@(\w+)"), r"\2.\1"),
+    (re.compile(r"(?<![:\w]):(\d+)\b"), r"?\1"),
+]
+
+
+def translate(sql):
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class _ErrorInfo:
+    # What oracledb puts in Error.args[0]
+    def __init__(self, full_code, message):
+        self.full_code = full_code
+        self.code = int(full_code.split("-")[1]) if full_code.startswith("ORA-") else 0
+        self.message = f"{full_code}: {message}"
+
+    def __str__(self):
+        return self.message
+
+
+def _no_answer(seconds, full_code, message):
+    time.sleep(seconds)
+    raise OperationalError(_ErrorInfo(full_code, message))
+
+
+def _check_connect(dsn, timeout):
+    if dsn in UNREACHABLE:
+        _no_answer(timeout or NO_ANSWER_TIMEOUT, "DPY-6005", f"cannot connect to database (CONNECTION_ID={dsn})")
+
+
+def _convert_error(e):
+    if isinstance(e, sqlite3.IntegrityError):
+        return IntegrityError(str(e))
+    # The errors callers tell apart by code: missing objects and no Oracle Text index
+    if "no such table" in str(e):
+        return DatabaseError(_ErrorInfo("ORA-00942", f"table or view does not exist ({e})"))
+    if "no such column" in str(e):
+        return DatabaseError(_ErrorInfo("ORA-00904", f"invalid identifier ({e})"))
+    if "no such function: CONTAINS" in str(e) or "no such function: SCORE" in str(e):
+        return DatabaseError(_ErrorInfo("ORA-20000", "Oracle Text error:\nDRG-10599: column is not indexed"))
+    return DatabaseError(str(e))
+
+
+# ---------------------------
+# LOBs and variables
+# ---------------------------
+class Lob:
+    """BLOB locator over bytes; every call is one round trip, like the real driver."""
+
+    def __init__(self, data=b""):
+        self.data = bytearray(data)
+
+    def size(self):
+        _round_trip()
+        return len(self.data)
+
+    def getchunksize(self):
+        return 8132
+
+    def read(self, offset=1, amount=None):
+        _round_trip()
+        start = offset - 1
+        return bytes(self.data[start:] if amount is None else self.data[start:start + amount])
+
+    def write(self, data, offset=1):
+        _round_trip()
+        start = offset - 1
+        self.data[start:start + len(data)] = data
+
+    def close(self):
+        pass
+
+
+class Var:
+    def __init__(self, typ=None, arraysize=1):
+        self.type = typ
+        self.values = [None] * arraysize
+
+    def getvalue(self, pos=0):
+        return self.values[pos]
+
+    def setvalue(self, pos, value):
+        self.values[pos] = value
+
+
+class BatchError:
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+        self.full_code = "SQLITE"
+
+
+# ---------------------------
+# Cursor / connection / pool
+# ---------------------------
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._db.cursor()
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.rowfactory = None
+        self.description = None
+        self.rowcount = 0
+        self._buffer = deque()
+        self._done = True
+        self._batch_errors = []
+
+    def var(self, typ, arraysize=1, **kwargs):
+        return Var(typ, arraysize)
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def _run(self, sql, params):
+        try:
+            self._cursor.execute(translate(sql), params)
+        except sqlite3.Error as e:
+            raise _convert_error(e)
+
+    def _check_reachable(self, statement):
+        timeout = self.connection.call_timeout / 1000 or NO_ANSWER_TIMEOUT
+        if self.connection.dsn in UNREACHABLE:
+            _no_answer(timeout, "DPY-4024", f"call timeout of {self.connection.call_timeout} ms exceeded")
+        for link, link_dsn in LINKS.items():
+            if link_dsn in UNREACHABLE and f"@{link}" in statement:
+                _no_answer(timeout, "ORA-12170", "TNS:Connect timeout occurred")
+
+    def execute(self, statement, parameters=None, **kwargs):
+        _round_trip()
+        _record_statement(statement)
+        self._check_reachable(statement)
+        params = parameters if parameters is not None else kwargs
+        if isinstance(params, dict):
+            params = {k: v for k, v in params.items() if not isinstance(v, Var)}
+        self._run(statement, params)
+        self.rowcount = self._cursor.rowcount
+        self.description = None
+        self._buffer.clear()
+        self._done = True
+        if self._cursor.description:
+            self.description = [(d[0].upper(), None, None, None, None, None, True) for d in self._cursor.description]
+            self._done = False
+            self._fill(self.prefetchrows or self.arraysize)
+            return self
+        return None
+
+    def executemany(self, statement, parameters, batcherrors=False, **kwargs):
+        _round_trip()
+        _record_statement(statement)
+        self._batch_errors = []
+        for offset, params in enumerate(parameters):
+            try:
+                self._run(statement, params)
+            except DatabaseError as e:
+                if not batcherrors:
+                    raise
+                self._batch_errors.append(BatchError(offset, str(e)))
+
+    def getbatcherrors(self):
+        return self._batch_errors
+
+    def _fill(self, amount):
+        rows = self._cursor.fetchmany(amount)
+        if len(rows) < amount:
+            self._done = True
+        self._buffer.extend(tuple(Lob(v) if isinstance(v, bytes) else v for v in row) for row in rows)
+
+    def _row(self, row):
+        # rowfactory is usually set after execute(), so apply it on the way out
+        return self.rowfactory(*row) if self.rowfactory else row
+
+    def fetchone(self):
+        if not self._buffer and not self._done:
+            _round_trip()
+            self._fill(self.arraysize)
+        return self._row(self._buffer.popleft()) if self._buffer else None
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = []
+        while len(rows) < size:
+            row = self.fetchone()
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def fetchall(self):
+        while not self._done:
+            _round_trip()
+            self._fill(self.arraysize)
+        rows = [self._row(row) for row in self._buffer]
+        self._buffer.clear()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Connection:
+    def __init__(self, dsn, pool=None):
+        self.dsn = dsn
+        self.call_timeout = 0
+        self._pool = pool
+        self._db = _open(dsn)
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        _round_trip()
+        self._db.commit()
+
+    def rollback(self):
+        _round_trip()
+        self._db.rollback()
+
+    def ping(self):
+        _round_trip()
+        if self.dsn in UNREACHABLE:
+            _no_answer(self.call_timeout / 1000 or NO_ANSWER_TIMEOUT, "DPY-4024",
+                       f"call timeout of {self.call_timeout} ms exceeded")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool._release(self)
+        else:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def keep_open(dsn):
+    # One connection per URI stays open so in-memory databases outlive their users
+    if dsn not in _keepalive:
+        _keepalive[dsn] = sqlite3.connect(dsn, uri=True, check_same_thread=False)
+
+
+def _open(dsn):
+    keep_open(dsn)
+    db = sqlite3.connect(dsn, uri=True, check_same_thread=False)
+    for link, link_dsn in LINKS.items():
+        if link_dsn != dsn:
+            keep_open(link_dsn)
+            db.execute("ATTACH DATABASE ? AS " + link, (link_dsn,))
+    return db
+
+
+def connect(user=None, password=None, dsn=None, tcp_connect_timeout=None, **kwargs):
+    _round_trip()
+    _check_connect(dsn, tcp_connect_timeout)
+    with _stats_lock:
+        stats["connects"] += 1
+    return Connection(dsn)
+
+
+class Pool:
+    def __init__(self, dsn, min=1, max=10, tcp_connect_timeout=None, **kwargs):
+        self.dsn = dsn
+        self.tcp_connect_timeout = tcp_connect_timeout
+        self.min = min
+        self.max = max
+        self._idle = []
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self):
+        return self._busy
+
+    @property
+    def opened(self):
+        return self._busy + len(self._idle)
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                self._busy += 1
+                return self._idle.pop()
+        _round_trip()
+        _check_connect(self.dsn, self.tcp_connect_timeout)
+        with self._lock:
+            self._busy += 1
+        with _stats_lock:
+            stats["connects"] += 1
+        return Connection(self.dsn, pool=self)
+
+    def _release(self, conn):
+        with self._lock:
+            self._busy -= 1
+            self._idle.append(conn)
+
+    def close(self, force=False):
+        with self._lock:
+            for conn in self._idle:
+                conn._db.close()
+            self._idle = []
+
+
+def create_pool(user=None, password=None, dsn=None, **kwargs):
+    return Pool(dsn, **{k: v for k, v in kwargs.items() if k in ("min", "max", "tcp_connect_timeout")})
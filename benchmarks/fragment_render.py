@@ -0,0 +1,102 @@
+"""
+Render time of the catalog page and the librarian dashboard with and
+without the fragment cache (services/fragment_cache.py).
+
+For each row count the page is rendered --repeat times inside a request
+context, from Book records already in memory (no database):
+
+    uncached   render books_table.html / librarian/book_grid.html, then the page
+    cached     fragment_cache.lookup() hit, then the page
+
+Usage:
+    python -m benchmarks.fragment_render [--rows 50,500,5000] [--repeat 50] [--output fragment-render.json]
+"""
+import os
+
+os.environ.setdefault("DB_DRIVER", "benchmarks.fake_oracle")
+os.environ.setdefault("DB_DSN", "file:bench_local?mode=memory&cache=shared")
+os.environ.setdefault("REMOTE_DB_DSN", "file:bench_remote?mode=memory&cache=shared")
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from flask import render_template
+from markupsafe import Markup
+
+from app import app
+from benchmarks.suite import WORDS, git_commit
+from services import fragment_cache
+from services.catalog import Book
+
+PAGES = {
+    # page: (URL, fragment template, fragment context name, page template)
+    "index": ("/?db_source=all&sort=title", "books_table.html", "books_table", "index.html"),
+    "librarian_dashboard": ("/librarian/", "librarian/book_grid.html", "book_grid", "librarian/dashboard.html"),
+}
+
+
+def books(count, seed=1):
+    rng = random.Random(seed)
+    return [Book(n, " ".join(rng.choice(WORDS) for _ in range(5)).capitalize(), f"Author {rng.randrange(500)}",
+                 f"University {rng.randrange(40)}", f"Department {rng.randrange(25)}", rng.randrange(1950, 2025),
+                 rng.choice(["Local", "Remote"]))
+            for n in range(1, count + 1)]
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure(page, rows, repeat):
+    url, fragment, name, template = PAGES[page]
+    records = books(rows)
+    with app.test_request_context(url):
+        key = fragment_cache.key(name, ["local", "remote"])
+
+        def uncached():
+            html = Markup(render_template(fragment, books=records, next_token="n", prev_token="p"))
+            return render_template(template, **{name: html})
+
+        def cached():
+            return render_template(template, **{name: fragment_cache.lookup(name, key)})
+
+        fragment_cache.store(key, render_template(fragment, books=records, next_token="n", prev_token="p"),
+                             ttl=3600)
+        assert uncached() == cached()
+        result = {"page": page, "rows": rows, "uncached_ms": median_ms(uncached, repeat),
+                  "cached_ms": median_ms(cached, repeat)}
+    result["speedup"] = result["uncached_ms"] / result["cached_ms"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page render time with and without the fragment cache.")
+    parser.add_argument("--rows", default="50,500,5000", help="comma-separated rows per page")
+    parser.add_argument("--repeat", type=int, default=50, help="renders per measurement")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for page in PAGES:
+        for rows in (int(r) for r in args.rows.split(",")):
+            result = measure(page, rows, args.repeat)
+            results.append(result)
+            print(f"{page:<20} {rows:>6} rows  uncached {result['uncached_ms']:8.2f} ms  "
+                  f"cached {result['cached_ms']:7.2f} ms  ({result['speedup']:.0f}x)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "results": results}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
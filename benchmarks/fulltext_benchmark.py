@@ -0,0 +1,111 @@
+"""
+Compare the ranked full-text search against the LIKE '%kw%' search.
+
+By default both run in-process over a synthetic catalog: the LIKE path is a
+linear substring scan of one column (what the database does on a full table
+scan) and the full-text path is services.fulltext.InvertedIndex. With --live
+both SQL paths (LIKE vs CONTAINS) run against the local database instead.
+
+Usage:
+    python -m benchmarks.fulltext_benchmark [--rows 100000] [--queries 200]
+    python -m benchmarks.fulltext_benchmark --live
+"""
+import argparse
+import random
+import statistics
+import time
+
+from services import fulltext
+
+SYLLABLES = ["ra", "ko", "mi", "tan", "lu", "ber", "sol", "qui", "den", "var", "os", "pel", "ni", "gra", "tum"]
+WORDS = sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES})
+UNIVERSITIES = ["University of Cebu", "Silliman University", "Ateneo de Manila", "UP Diliman", "USC"]
+DEPARTMENTS = ["Engineering", "Computer Science", "Marine Biology", "Education", "Nursing"]
+AUTHORS = ["Santos", "Reyes", "Cruz", "Garcia", "Mendoza", "Torres", "Flores", "Ramos"]
+
+
+def synthetic_catalog(rows, seed=42):
+    rng = random.Random(seed)
+    return [
+        (
+            book_id,
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 7))).title(),
+            f"{rng.choice(AUTHORS)}, {rng.choice(AUTHORS)[0]}.",
+            rng.choice(UNIVERSITIES),
+            rng.choice(DEPARTMENTS),
+            rng.randint(1980, 2025),
+        )
+        for book_id in range(1, rows + 1)
+    ]
+
+
+def like_scan(rows, keyword, column=1):
+    needle = keyword.lower()
+    return [row for row in rows if row[column] and needle in row[column].lower()]
+
+
+def _timed(fn, queries):
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def run_synthetic(rows, queries):
+    catalog = synthetic_catalog(rows)
+    rng = random.Random(7)
+    keywords = [rng.choice(WORDS)[:rng.randint(3, 6)] for _ in range(queries)]
+
+    started = time.perf_counter()
+    index = fulltext.InvertedIndex(catalog)
+    print(f"Built inverted index over {rows} rows in {time.perf_counter() - started:.2f} s "
+          f"({len(index.postings)} tokens)")
+
+    _report("LIKE '%kw%' (one column)", _timed(lambda q: like_scan(catalog, q), keywords))
+    _report("full-text (all columns)", _timed(lambda q: index.search(q, 50), keywords))
+
+
+def run_live(queries):
+    from dbconnections.dbconnections import get_connection
+
+    rng = random.Random(7)
+    keywords = [rng.choice(WORDS)[:rng.randint(3, 6)] for _ in range(queries)]
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        def like(q):
+            cursor.execute(
+                "SELECT book_id FROM university_books WHERE LOWER(title) LIKE :kw FETCH FIRST 50 ROWS ONLY",
+                {"kw": f"%{q}%"}
+            )
+            cursor.fetchall()
+
+        def contains(q):
+            fulltext.search(conn, "Local", q, limit=50)
+
+        _report("LIKE '%kw%' (SQL)", _timed(like, keywords))
+        _report(f"full-text ({fulltext.FULLTEXT_BACKEND})", _timed(contains, keywords))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full-text search against LIKE.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="query the local Oracle database")
+    args = parser.parse_args()
+
+    if args.live:
+        run_live(args.queries)
+    else:
+        run_synthetic(args.rows, args.queries)
@@ -0,0 +1,112 @@
+"""
+Round trips per remote_library page, before and after batching.
+
+"before" replays the previous implementation (a new connection and one
+SELECT over the DB link per saved book); "after" is
+routes.user_library.fetch_remote_books. Both run against an in-memory
+connection that counts connects and round trips and sleeps --latency ms
+for each, to show what the difference costs on a real network.
+
+Usage:
+    python -m benchmarks.remote_library_benchmark [--saved 300] [--latency 2]
+"""
+import argparse
+import time
+
+from routes.user_library import fetch_remote_books, REMOTE_BATCH_SIZE
+
+
+class CountingConnection:
+    """Answers the remote_library statements from a dict and counts round trips."""
+
+    stats = {"connects": 0, "round_trips": 0}
+    arraysize = prefetchrows = 100
+
+    def __init__(self, books, latency):
+        self.books = books
+        self.latency = latency
+        self.rows = []
+        self.rowfactory = None
+        self._wait()
+        self.stats["connects"] += 1
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency / 1000)
+
+    def cursor(self):
+        return self
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def execute(self, sql, params=None):
+        self._wait()
+        self.stats["round_trips"] += 1
+        ids = params if isinstance(params, (list, tuple)) else []
+        self.rows = [self.books[i] for i in ids if i in self.books]
+        self.rowfactory = None  # as in python-oracledb, reset by every execute
+
+    def _fetched(self):
+        return [self.rowfactory(*row) for row in self.rows] if self.rowfactory else list(self.rows)
+
+    def fetchone(self):
+        rows = self._fetched()
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        return self._fetched()
+
+    def __iter__(self):
+        return iter(self._fetched())
+
+    def close(self):
+        pass
+
+
+def before(book_ids, connect):
+    found = {}
+    for book_id in book_ids:
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT ... FROM university_books@remote_uni WHERE book_id = :1", (book_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        if row:
+            found[row[0]] = row
+    return found
+
+
+def after(book_ids, connect):
+    conn = connect()
+    cursor = conn.cursor()
+    found = fetch_remote_books(cursor, book_ids)
+    cursor.close()
+    conn.close()
+    return found
+
+
+def run(label, fn, book_ids, books, latency):
+    CountingConnection.stats.update(connects=0, round_trips=0)
+    started = time.perf_counter()
+    found = fn(book_ids, lambda: CountingConnection(books, latency))
+    elapsed = (time.perf_counter() - started) * 1000
+    stats = CountingConnection.stats
+    print(f"{label:<8} connects {stats['connects']:>5}   round trips {stats['round_trips']:>5}   "
+          f"{elapsed:9.1f} ms   found {len(found)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare remote_library round trips before/after batching.")
+    parser.add_argument("--saved", type=int, default=300, help="remote books saved by the student")
+    parser.add_argument("--latency", type=float, default=2.0, help="simulated ms per connect / round trip")
+    args = parser.parse_args()
+
+    book_ids = list(range(1, args.saved + 1))
+    # A few saved books have since been deleted from the remote catalog
+    books = {i: (i, f"Title {i}", "Author", "Remote U", "Dept", 2020) for i in book_ids if i % 50}
+
+    print(f"{args.saved} saved remote books, batch size {REMOTE_BATCH_SIZE}, {args.latency} ms latency")
+    run("before", before, book_ids, books, args.latency)
+    run("after", after, book_ids, books, args.latency)
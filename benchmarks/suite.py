@@ -0,0 +1,254 @@
+"""
+Micro-benchmarks for the catalog read paths, runnable without Oracle.
+
+The app is pointed at benchmarks.fake_oracle (SQLite in memory, simulated
+LOBs, --latency ms per round trip). For every catalog size the local and
+remote databases are seeded and each case runs --repeat times:
+
+    query_books          books.query_books row mapping (one 50-row page)
+    index                GET /            (db_source=all, title search)
+    index_facet          GET /            (db_source=all, one university selected)
+    my_library           GET /library/my-library
+    remote_library       GET /library/remote-library
+    librarian_dashboard  GET /librarian/
+    view_pdf             GET /view/<id>   (1 MB PDF, body fully read)
+    search_mix           GET /            cycling through every filter, sort and
+                                          a handful of keywords, one per call
+    remote_down          GET /            (db_source=all) with the remote host not
+                                          answering: the first calls wait for the
+                                          timeouts until the circuit opens. Runs
+                                          last, as the circuit stays open after it.
+
+The search result and fragment caches are disabled so every request reaches
+the database.
+Results (median/p95 latency, round trips per call and distinct SQL texts per
+case) are written as JSON, tagged with the current commit, for comparison
+between revisions. The "sql_statements" section lists every distinct SQL text
+the run executed with its execution count: the statements the database would
+have to hard-parse.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1000,10000,100000,1000000] [--latency 0.5]
+                               [--repeat 20] [--output benchmark-results.json]
+"""
+import os
+
+os.environ.setdefault("DB_DRIVER", "benchmarks.fake_oracle")
+os.environ.setdefault("DB_DSN", "file:bench_local?mode=memory&cache=shared")
+os.environ.setdefault("REMOTE_DB_DSN", "file:bench_remote?mode=memory&cache=shared")
+os.environ.setdefault("RESULT_CACHE_TTL", "0")
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks import fake_oracle
+from dbconnections.dbconnections import get_connection
+
+SAVED_PER_SOURCE = 50
+PDF_BYTES = 1024 * 1024
+MEMBER_ID, LIBRARIAN_ID = 1, 2
+
+SCHEMA = [
+    """CREATE TABLE users (user_id INTEGER PRIMARY KEY, name TEXT, email TEXT, password_hash TEXT,
+                           role TEXT, profile_image BLOB, created_at TEXT)""",
+    """CREATE TABLE university_books (book_id INTEGER PRIMARY KEY, title TEXT, author TEXT, university TEXT,
+                                      department TEXT, year_published INTEGER, availability TEXT,
+                                      pdf_file BLOB, uploaded_by INTEGER,
+                                      pdf_changed_at TEXT DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE user_library (user_id INTEGER, book_id INTEGER, title TEXT, author TEXT, university TEXT,
+                                  department TEXT, year_published INTEGER, pdf_file BLOB, added_at TEXT,
+                                  source TEXT, pdf_sha256 TEXT, PRIMARY KEY (user_id, book_id))""",
+    "CREATE TABLE pdf_store (sha256 TEXT PRIMARY KEY, pdf_file BLOB, byte_size INTEGER, created_at TEXT)",
+    "CREATE TABLE dual (dummy TEXT)",
+    "INSERT INTO dual VALUES ('X')",
+    "CREATE INDEX books_title_idx ON university_books (title, book_id)",
+    "CREATE INDEX books_facets_idx ON university_books (university, department, year_published)",
+]
+
+WORDS = ["data", "systems", "learning", "network", "theory", "analysis", "design", "history",
+         "quantum", "energy", "policy", "language", "biology", "market", "urban", "health"]
+
+
+def book_rows(size, seed):
+    rng = random.Random(seed)
+    for book_id in range(1, size + 1):
+        title = " ".join(rng.choice(WORDS) for _ in range(4)).capitalize()
+        yield (book_id, title, f"Author {rng.randrange(5000)}", f"University {rng.randrange(40)}",
+               f"Department {rng.randrange(25)}", rng.randrange(1950, 2026), None)
+
+
+def seed(dsn, size, seed_value):
+    fake_oracle.keep_open(dsn)
+    db = sqlite3.connect(dsn, uri=True)
+    for table in ("users", "university_books", "user_library", "pdf_store", "dual"):
+        db.execute(f"DROP TABLE IF EXISTS {table}")
+    for statement in SCHEMA:
+        db.execute(statement)
+    db.executemany("""
+        INSERT INTO university_books (book_id, title, author, university, department, year_published, pdf_file)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, book_rows(size, seed_value))
+    db.execute("UPDATE university_books SET pdf_file = ? WHERE book_id = 1", (os.urandom(PDF_BYTES),))
+    db.commit()
+    return db
+
+
+def seed_library(db, size):
+    db.executemany("INSERT INTO users (user_id, name, email, password_hash, role) VALUES (?, ?, ?, 'x', ?)",
+                   [(MEMBER_ID, "Member", "member@example.com", "member"),
+                    (LIBRARIAN_ID, "Librarian", "librarian@example.com", "librarian")])
+    step = max(1, size // SAVED_PER_SOURCE)
+    entries = []
+    for n, book_id in enumerate(range(1, size + 1, step)[:SAVED_PER_SOURCE]):
+        for source in ("Local", "Remote"):
+            entries.append((MEMBER_ID, book_id if source == "Local" else size + 1 - book_id,
+                            f"Saved {book_id}", "Author", "University", "Department", 2020,
+                            f"2025-01-01 00:{n // 60:02d}:{n % 60:02d}", source))
+    db.executemany("""
+        INSERT INTO user_library (user_id, book_id, title, author, university, department,
+                                  year_published, added_at, source)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, entries)
+    db.commit()
+
+
+def timed(fn, repeat):
+    timings, round_trips = [], []
+    fn()  # warm-up: pools, statement parsing, templates
+    for _ in range(repeat):
+        fake_oracle.reset_stats()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        round_trips.append(fake_oracle.stats["round_trips"])
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "min_ms": round(timings[0], 3),
+        "round_trips": statistics.median(round_trips),
+    }
+
+
+def cases(app):
+    from routes.books import query_books
+
+    member = app.test_client()
+    librarian = app.test_client()
+    with member.session_transaction() as s:
+        s.update(user_id=MEMBER_ID, role="member", name="Member")
+    with librarian.session_transaction() as s:
+        s.update(user_id=LIBRARIAN_ID, role="librarian", name="Librarian")
+
+    def get(client, url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            response.get_data()
+        return run
+
+    searches = itertools.cycle(itertools.product(
+        ["title", "author", "university", "department", "year_published", ""],
+        ["book_id", "title", "author", "university", "department", "year_published"],
+        ["data", "theory", "1", "urban"],
+    ))
+
+    def search_mix():
+        search_type, sort, keyword = next(searches)
+        get(member, f"/?db_source=all&filter={search_type}&keyword={keyword}&sort={sort}")()
+
+    def remote_down():
+        fake_oracle.UNREACHABLE.add(os.environ["REMOTE_DB_DSN"])
+        try:
+            get(member, "/?db_source=all&sort=title")()
+        finally:
+            fake_oracle.UNREACHABLE.discard(os.environ["REMOTE_DB_DSN"])
+
+    def query_books_page():
+        conn = get_connection()
+        try:
+            query_books(conn, "Local", sort="title", limit=50)
+        finally:
+            conn.close()
+
+    return {
+        "query_books": query_books_page,
+        "index": get(member, "/?db_source=all&filter=title&keyword=data&sort=title"),
+        "index_facet": get(member, "/?db_source=all&university=University+3&sort=title"),
+        "my_library": get(member, "/library/my-library"),
+        "remote_library": get(member, "/library/remote-library"),
+        "librarian_dashboard": get(librarian, "/librarian/"),
+        "view_pdf": get(member, "/view/1?source=local"),
+        "search_mix": search_mix,
+        "remote_down": remote_down,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog read-path micro-benchmarks against a SQLite stand-in.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated ms per round trip")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    parser.add_argument("--cases", help="comma-separated subset of cases")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON results file")
+    args = parser.parse_args()
+
+    from app import app
+    fake_oracle.LATENCY_MS = args.latency
+
+    results = []
+    executed = Counter()
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Seeding {size} books per database...")
+        local = seed(os.environ["DB_DSN"], size, seed_value=1)
+        remote = seed(os.environ["REMOTE_DB_DSN"], size, seed_value=2)
+        seed_library(local, size)
+
+        for name, fn in cases(app).items():
+            if args.cases and name not in args.cases.split(","):
+                continue
+            fake_oracle.clear_statements()
+            result = {"case": name, "catalog_size": size, **timed(fn, args.repeat)}
+            result["distinct_sql"] = len(fake_oracle.statements)
+            executed.update(fake_oracle.statements)
+            results.append(result)
+            print(f"  {name:<20} median {result['median_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                  f"{result['round_trips']:5.0f} round trips  {result['distinct_sql']:3d} distinct SQL")
+        local.close()
+        remote.close()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "latency_ms": args.latency,
+        "repeat": args.repeat,
+        "results": results,
+        "sql_statements": [{"sql": " ".join(sql.split()), "executions": count}
+                           for sql, count in executed.most_common()],
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(executed)} distinct SQL texts executed")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
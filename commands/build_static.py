@@ -0,0 +1,121 @@
+"""
+Build fingerprinted copies of static/ for services/static_assets.py.
+
+Every file under static/ is copied to static/dist/ with a content hash in
+its name (style.css -> dist/style.3f9c2a1b7e4d.css). Text assets also get
+pre-built .gz and, with the brotli package installed, .br variants.
+url(...) references in CSS are rewritten to the hashed names first, so a
+changed image also changes the hash of the stylesheets using it.
+static/dist/manifest.json maps each original name to its hashed copy.
+
+Run it on every deploy; the app reads the manifest at startup. Files from
+earlier builds are kept (pages cached with the old names keep working)
+unless --clean is given.
+
+Usage:
+    python -m commands.build_static [--static-dir static] [--url-prefix /static] [--clean]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+from services.static_assets import DIST_DIR, ENCODINGS, MANIFEST
+
+HASH_LENGTH = 12
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".xml"}
+MIN_SAVING = 0.9  # keep a compressed variant only if it is at most this fraction of the original
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def source_files(static_dir):
+    """Static files as paths relative to static_dir (with /), CSS last so images are hashed first."""
+    names = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in files:
+            names.append(os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, "/"))
+    return sorted(names, key=lambda name: (name.endswith(".css"), name))
+
+
+def rewrite_css(css, name, manifest, url_prefix):
+    """Point url(...) references at hashed files (as absolute URLs)."""
+    base = f"{url_prefix}/{name}"
+
+    def replace(match):
+        quote, ref = match.groups()
+        if ref.startswith(("data:", "http:", "https:", "//")):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(base), ref.split("?")[0].split("#")[0]))
+        logical = target[len(url_prefix) + 1:] if target.startswith(url_prefix + "/") else None
+        if logical not in manifest:
+            return match.group(0)
+        return f"url({quote}{url_prefix}/{manifest[logical]['path']}{quote})"
+
+    return _CSS_URL.sub(replace, css)
+
+
+def compressed_variants(data):
+    """{Accept-Encoding token: bytes} for the encodings worth keeping."""
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        variants["br"] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    return {name: body for name, body in variants.items() if len(body) <= len(data) * MIN_SAVING}
+
+
+def build(static_dir="static", url_prefix="/static", clean=False):
+    dist = os.path.join(static_dir, DIST_DIR)
+    if clean:
+        shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist, exist_ok=True)
+
+    manifest = {}
+    totals = {"files": 0, "bytes": 0, "compressed": 0}
+    for name in source_files(static_dir):
+        with open(os.path.join(static_dir, name), "rb") as f:
+            data = f.read()
+        if name.endswith(".css"):
+            data = rewrite_css(data.decode("utf-8"), name, manifest, url_prefix).encode("utf-8")
+
+        stem, ext = posixpath.splitext(name)
+        hashed = f"{DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+        target = os.path.join(static_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+
+        variants = compressed_variants(data) if ext.lower() in COMPRESSIBLE else {}
+        for encoding, suffix in ENCODINGS:
+            if encoding in variants:
+                with open(target + suffix, "wb") as f:
+                    f.write(variants[encoding])
+        manifest[name] = {"path": hashed, "encodings": [encoding for encoding, _ in ENCODINGS if encoding in variants]}
+
+        totals["files"] += 1
+        totals["bytes"] += len(data)
+        totals["compressed"] += min([len(data)] + [len(body) for body in variants.values()])
+
+    with open(os.path.join(dist, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"Built {totals['files']} static files into {dist}: {totals['bytes'] / 1024:.0f} KB, "
+          f"{totals['compressed'] / 1024:.0f} KB with the best encoding")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets.")
+    parser.add_argument("--static-dir", default="static", help="directory to build from")
+    parser.add_argument("--url-prefix", default="/static", help="URL path static files are served under")
+    parser.add_argument("--clean", action="store_true", help="remove files from earlier builds")
+    args = parser.parse_args()
+
+    build(args.static_dir, args.url_prefix.rstrip("/"), args.clean)
@@ -0,0 +1,186 @@
+"""
+Bulk-load manuscripts from a manifest and a directory of PDFs.
+
+The manifest is CSV (header row) or JSON (a list of objects) with the fields
+title, author, university, department, year_published and pdf (file name
+inside --pdf-dir). Metadata is inserted with executemany(batcherrors=True),
+each PDF is streamed into its BLOB, and every batch is committed together
+with the import's progress, so re-running the same command resumes after
+the last committed batch. Rejected rows are written to <manifest>.errors.csv.
+
+Usage:
+    python -m commands.bulk_import manifest.csv --pdf-dir ./pdfs [--batch-size 200] [--remote]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+import oracledb
+
+from dbconnections.dbconnections import get_connection, get_remote_connection
+from migrations import bulk_import_progress
+from services import result_cache
+from services.lob_stream import write_stream
+
+FIELDS = ["title", "author", "university", "department", "year_published", "pdf"]
+
+INSERT_SQL = """
+    INSERT INTO university_books
+    (title, author, university, department, year_published, pdf_file, uploaded_by)
+    VALUES (:title, :author, :university, :department, :year_published, EMPTY_BLOB(), :uploaded_by)
+    RETURNING book_id, pdf_file INTO :book_id, :pdf_out
+"""
+
+
+def read_manifest(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def manifest_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def validate(entry, pdf_dir):
+    """Return (bind dict, pdf path) for a manifest entry, or raise ValueError."""
+    missing = [field for field in FIELDS if not str(entry.get(field) or "").strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        year = int(entry["year_published"])
+    except ValueError:
+        raise ValueError(f"year_published is not a number: {entry['year_published']!r}")
+    pdf_path = os.path.join(pdf_dir, entry["pdf"])
+    if not os.path.isfile(pdf_path):
+        raise ValueError(f"PDF not found: {pdf_path}")
+    binds = {field: str(entry[field]).strip() for field in FIELDS[:4]}
+    binds["year_published"] = year
+    return binds, pdf_path
+
+
+def rows_done(cursor, sha):
+    cursor.execute("SELECT rows_done FROM bulk_import_progress WHERE manifest_sha256 = :1", (sha,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def save_progress(cursor, sha, name, done):
+    cursor.execute("""
+        MERGE INTO bulk_import_progress p
+        USING (SELECT :sha AS manifest_sha256 FROM dual) src
+        ON (p.manifest_sha256 = src.manifest_sha256)
+        WHEN MATCHED THEN UPDATE SET rows_done = :done, updated_at = SYSTIMESTAMP
+        WHEN NOT MATCHED THEN INSERT (manifest_sha256, manifest_name, rows_done) VALUES (:sha, :name, :done)
+    """, {"sha": sha, "name": name[:255], "done": done})
+
+
+def import_batch(cursor, batch, uploaded_by):
+    """
+    Insert one batch. batch is [(manifest_row, binds, pdf_path)].
+    Returns (rows inserted, PDF bytes written, [(manifest_row, error)]).
+    """
+    rows = [{**binds, "uploaded_by": uploaded_by} for _, binds, _ in batch]
+    book_ids = cursor.var(oracledb.DB_TYPE_NUMBER, arraysize=len(rows))
+    lobs = cursor.var(oracledb.DB_TYPE_BLOB, arraysize=len(rows))
+    cursor.setinputsizes(book_id=book_ids, pdf_out=lobs)
+    cursor.executemany(INSERT_SQL, rows, batcherrors=True)
+
+    errors = {e.offset: e.message for e in cursor.getbatcherrors()}
+    inserted, written = 0, 0
+    for i, (_, _, pdf_path) in enumerate(batch):
+        if i in errors:
+            continue
+        with open(pdf_path, "rb") as f:
+            written += write_stream(lobs.getvalue(i)[0], f)
+        inserted += 1
+    return inserted, written, [(batch[i][0], message) for i, message in errors.items()]
+
+
+def run(manifest, pdf_dir, batch_size=200, remote=False, uploaded_by=None):
+    entries = read_manifest(manifest)
+    sha = manifest_sha256(manifest)
+    errors_path = manifest + ".errors.csv"
+
+    conn = get_remote_connection() if remote else get_connection()
+    cursor = conn.cursor()
+    bulk_import_progress.upgrade(conn)
+
+    start = rows_done(cursor, sha)
+    if start:
+        print(f"Resuming {manifest} after row {start} of {len(entries)}")
+
+    totals = {"inserted": 0, "rejected": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    with open(errors_path, "a", newline="", encoding="utf-8") as errors_file:
+        error_writer = csv.writer(errors_file)
+        try:
+            for batch_start in range(start, len(entries), batch_size):
+                batch_entries = entries[batch_start:batch_start + batch_size]
+                batch, rejected = [], []
+                for offset, entry in enumerate(batch_entries):
+                    manifest_row = batch_start + offset + 1
+                    try:
+                        binds, pdf_path = validate(entry, pdf_dir)
+                        batch.append((manifest_row, binds, pdf_path))
+                    except ValueError as e:
+                        rejected.append((manifest_row, str(e)))
+
+                if batch:
+                    inserted, written, failed = import_batch(cursor, batch, uploaded_by)
+                    rejected += failed
+                    totals["inserted"] += inserted
+                    totals["bytes"] += written
+
+                # Progress is committed atomically with the batch it describes
+                save_progress(cursor, sha, os.path.basename(manifest), batch_start + len(batch_entries))
+                conn.commit()
+
+                for manifest_row, message in rejected:
+                    error_writer.writerow([manifest_row, message])
+                totals["rejected"] += len(rejected)
+
+                elapsed = time.perf_counter() - started
+                print(f"  rows {batch_start + len(batch_entries)}/{len(entries)}  "
+                      f"{totals['inserted'] / elapsed:7.1f} rows/s  "
+                      f"{totals['bytes'] / elapsed / 1024 / 1024:6.1f} MB/s  "
+                      f"rejected {totals['rejected']}")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    if totals["inserted"]:
+        result_cache.bump_catalog_version("remote" if remote else "local")
+
+    elapsed = time.perf_counter() - started
+    print(f"Imported {totals['inserted']} books ({totals['bytes'] / 1024 / 1024:.1f} MB of PDFs) "
+          f"in {elapsed:.1f} s; {totals['rejected']} rejected")
+    if totals["rejected"]:
+        print(f"Rejected rows are listed in {errors_path}")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import manuscripts from a CSV/JSON manifest.")
+    parser.add_argument("manifest", help="CSV or JSON manifest")
+    parser.add_argument("--pdf-dir", required=True, help="directory holding the PDFs named in the manifest")
+    parser.add_argument("--batch-size", type=int, default=200, help="rows per executemany / commit")
+    parser.add_argument("--uploaded-by", type=int, help="user_id recorded as uploader")
+    parser.add_argument("--remote", action="store_true", help="import into the remote database")
+    args = parser.parse_args()
+
+    totals = run(args.manifest, args.pdf_dir, args.batch_size, args.remote, args.uploaded_by)
+    sys.exit(1 if totals["rejected"] else 0)
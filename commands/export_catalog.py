@@ -0,0 +1,59 @@
+"""
+Export the catalog to a CSV or NDJSON file (or stdout), streamed.
+
+The format and compression follow the output name (catalog.ndjson.gz)
+unless given with --format / --gzip.
+
+Usage:
+    python -m commands.export_catalog catalog.csv.gz [--source local|remote|all] [--format csv|ndjson] [--gzip]
+    python -m commands.export_catalog - --format ndjson | ...
+"""
+import argparse
+import sys
+import time
+
+from dbconnections.dbconnections import get_connection, get_remote_connection
+from services import catalog_export
+
+
+def run(output, source="local", fmt=None, compress=None):
+    name = output.lower()
+    if compress is None:
+        compress = name.endswith(".gz")
+    if fmt is None:
+        fmt = "ndjson" if name.removesuffix(".gz").endswith((".ndjson", ".jsonl")) else "csv"
+
+    started = time.perf_counter()
+    opened = []
+    try:
+        for name in (["local", "remote"] if source == "all" else [source]):
+            opened.append((name.capitalize(), get_connection() if name == "local" else get_remote_connection()))
+
+        out = sys.stdout.buffer if output == "-" else open(output, "wb")
+        written = 0
+        try:
+            for chunk in catalog_export.stream(opened, fmt, compress):
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    finally:
+        for _, conn in opened:
+            conn.close()
+
+    print(f"Exported the {source} catalog as {fmt}{' (gzip)' if compress else ''}: "
+          f"{written / 1024 / 1024:.1f} MB in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the catalog to a CSV / NDJSON file.")
+    parser.add_argument("output", help="output file, - for stdout")
+    parser.add_argument("--source", choices=["local", "remote", "all"], default="local",
+                        help="database(s) to export")
+    parser.add_argument("--format", choices=sorted(catalog_export.FORMATS), help="default: from the file name")
+    parser.add_argument("--gzip", action="store_true", default=None, help="default: when the name ends in .gz")
+    args = parser.parse_args()
+
+    run(args.output, args.source, args.format, args.gzip)
@@ -0,0 +1,56 @@
+"""
+Extract the text of new and changed manuscripts into the content index
+(services/content_index.py) behind "Inside Manuscripts" search.
+
+Safe to interrupt: every batch is committed with its text, and the next run
+picks up the PDFs still pending. Keep it running with --loop to index new
+uploads as they arrive.
+
+Usage:
+    python -m commands.index_manuscripts [--remote] [--workers 4] [--batch-size 20] [--limit N]
+                                         [--loop] [--interval 60]
+"""
+import argparse
+import time
+
+from dbconnections.dbconnections import get_connection, get_remote_connection
+from services import content_index, result_cache
+
+
+def run(remote=False, workers=content_index.INDEX_WORKERS, batch_size=content_index.BATCH_SIZE, limit=None):
+    started = time.perf_counter()
+    conn = get_remote_connection() if remote else get_connection()
+    try:
+        removed = content_index.remove_deleted(conn)
+        totals = content_index.index_pending(conn, workers, batch_size, limit)
+    finally:
+        conn.close()
+
+    if totals["indexed"] or totals["failed"] or removed:
+        result_cache.bump_catalog_version("remote" if remote else "local")
+    print(f"Indexed {totals['indexed']} manuscripts, {totals['failed']} unreadable, {removed} deleted "
+          f"in {time.perf_counter() - started:.1f} s")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the text of new and changed manuscripts.")
+    parser.add_argument("--remote", action="store_true", help="index the remote database")
+    parser.add_argument("--workers", type=int, default=content_index.INDEX_WORKERS,
+                        help="text extraction processes")
+    parser.add_argument("--batch-size", type=int, default=content_index.BATCH_SIZE, help="PDFs per commit")
+    parser.add_argument("--limit", type=int, help="stop after this many PDFs")
+    parser.add_argument("--loop", action="store_true", help="keep indexing every --interval seconds")
+    parser.add_argument("--interval", type=int, default=60, help="seconds between runs with --loop")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            run(args.remote, args.workers, args.batch_size, args.limit)
+        except Exception as e:
+            if not args.loop:
+                raise
+            print(f"Manuscript indexing failed: {e}")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,51 @@
+"""
+Refresh the local mirror of the remote catalog (services/remote_mirror.py).
+
+Each run copies only the remote rows added or changed since the previous
+run and removes the ones deleted there. Schedule it (cron, systemd timer)
+more often than REMOTE_MIRROR_MAX_AGE, or keep it running with --loop.
+
+Usage:
+    python -m commands.sync_remote_mirror [--loop] [--interval 60]
+"""
+import argparse
+import time
+
+from dbconnections.dbconnections import get_connection, remote_link
+from services import remote_mirror, result_cache
+
+
+def run():
+    started = time.perf_counter()
+    conn = get_connection()
+    try:
+        with remote_link(conn):
+            totals = remote_mirror.sync(conn)
+    finally:
+        conn.close()
+
+    if totals["changed"] or totals["deleted"]:
+        # Remote searches served from the mirror change with it
+        result_cache.bump_catalog_version("remote")
+    print(f"Mirrored {totals['changed']} new or changed books, removed {totals['deleted']} "
+          f"in {time.perf_counter() - started:.1f} s")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local mirror of the remote catalog.")
+    parser.add_argument("--loop", action="store_true", help="keep syncing every --interval seconds")
+    parser.add_argument("--interval", type=int, default=remote_mirror.SYNC_INTERVAL,
+                        help="seconds between runs with --loop")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            run()
+        except Exception as e:
+            if not args.loop:
+                raise
+            print(f"Mirror sync failed: {e}")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
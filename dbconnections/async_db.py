@@ -0,0 +1,108 @@
+"""
+Asyncio connections built on python-oracledb's async API.
+
+Pools are created lazily per event loop (an async connection belongs to the
+loop that opened it), with the same POOL_SETTINGS as the threaded pools.
+
+From an ASGI app, use async_connection() directly in the server's loop.
+From Flask views, run the coroutine on the shared background loop:
+
+    books, errors = run(federated_query_async(...))            # sync view
+    books, errors = await on_shared_loop(federated_query_async(...))   # async view
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+import oracledb
+
+from dbconnections.dbconnections import BREAKERS, CALL_TIMEOUTS, POOL_SETTINGS, connect_options, credentials, pool_options
+
+_pools = {}            # event loop -> {source: AsyncConnectionPool}
+_shared_loop = None
+_shared_loop_lock = threading.Lock()
+
+
+def _loop_pools():
+    return _pools.setdefault(asyncio.get_running_loop(), {})
+
+
+def _pool(source):
+    pools = _loop_pools()
+    if source not in pools:
+        pools[source] = oracledb.create_pool_async(
+            **credentials(source),
+            **connect_options(source),
+            **pool_options(source),
+            **POOL_SETTINGS
+        )
+    return pools[source]
+
+
+async def init_async_pools():
+    """Create both pools in the running loop, e.g. on ASGI startup."""
+    for source in ("local", "remote"):
+        _pool(source)
+
+
+async def close_async_pools():
+    for pool in _pools.pop(asyncio.get_running_loop(), {}).values():
+        await pool.close(force=True)
+
+
+@asynccontextmanager
+async def async_connection(source="local"):
+    """
+    Borrow a pooled async connection:
+
+        async with async_connection("remote") as conn:
+            ...
+
+    Goes through the same circuit breaker and call timeout as the threaded
+    connections.
+    """
+    source = source.lower()
+    breaker = BREAKERS.get(source)
+    if breaker:
+        breaker.before_call()
+    pool = _pool(source)
+    try:
+        conn = await pool.acquire()
+    except Exception as e:
+        if breaker:
+            breaker.record(e)
+        raise
+    conn.call_timeout = CALL_TIMEOUTS.get(source, 0)
+    try:
+        yield conn
+    except Exception as e:
+        if breaker:
+            breaker.record(e)
+        raise
+    else:
+        if breaker:
+            breaker.record_success()
+    finally:
+        await pool.release(conn)
+
+
+# ---------------------------
+# Shared loop for Flask views
+# ---------------------------
+def _get_shared_loop():
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = asyncio.new_event_loop()
+            threading.Thread(target=_shared_loop.run_forever, name="async-db", daemon=True).start()
+    return _shared_loop
+
+
+def run(coro, timeout=None):
+    """Run a coroutine on the shared loop and wait for its result (sync callers)."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_shared_loop()).result(timeout)
+
+
+async def on_shared_loop(coro):
+    """Await a coroutine that runs on the shared loop (async Flask views get a fresh loop per request)."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_shared_loop()))
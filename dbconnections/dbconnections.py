@@ -0,0 +1,233 @@
+import importlib
+import os
+from contextlib import contextmanager
+
+# DB_DRIVER=benchmarks.fake_oracle swaps in the SQLite stand-in used by the benchmarks
+oracledb = importlib.import_module(os.environ.get("DB_DRIVER", "oracledb"))
+
+from services import metrics
+from services.circuit_breaker import HALF_OPEN, CircuitBreaker, CircuitOpenError  # noqa: F401 (re-exported)
+
+# ----------------------
+# CONNECTION SETTINGS
+# ----------------------
+DB_USER = os.environ.get("DB_USER", "username")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "password")
+DB_DSN = os.environ.get("DB_DSN", "localhost/FREE")
+
+REMOTE_DB_USER = os.environ.get("REMOTE_DB_USER", "username")
+REMOTE_DB_PASSWORD = os.environ.get("REMOTE_DB_PASSWORD", "password")
+REMOTE_DB_DSN = os.environ.get("REMOTE_DB_DSN", "192.168.1.2/FREE")
+
+# ----------------------
+# POOL SETTINGS
+# ----------------------
+POOL_SETTINGS = {
+    "min": int(os.environ.get("DB_POOL_MIN", 1)),
+    "max": int(os.environ.get("DB_POOL_MAX", 10)),
+    "increment": int(os.environ.get("DB_POOL_INCREMENT", 1)),
+    "timeout": int(os.environ.get("DB_POOL_TIMEOUT", 300)),          # idle seconds before a pooled connection is closed
+    "ping_interval": int(os.environ.get("DB_POOL_PING_INTERVAL", 60)),
+    "stmtcachesize": int(os.environ.get("DB_STMT_CACHE_SIZE", 50)),
+}
+
+# ----------------------
+# REMOTE TIMEOUTS / CIRCUIT BREAKER
+# ----------------------
+REMOTE_CONNECT_TIMEOUT = float(os.environ.get("REMOTE_CONNECT_TIMEOUT", 3))   # seconds: TCP connect, pool wait
+REMOTE_CALL_TIMEOUT = float(os.environ.get("REMOTE_CALL_TIMEOUT", 10))        # seconds per round trip
+BREAKER_FAILURES = int(os.environ.get("REMOTE_BREAKER_FAILURES", 3))         # consecutive failures to open
+BREAKER_RESET = float(os.environ.get("REMOTE_BREAKER_RESET", 30))            # seconds open before a probe
+
+# Errors meaning the database (or the DB link to it) can't be reached in time
+UNAVAILABLE_CODES = {
+    "DPY-4005",   # timed out waiting for the pool
+    "DPY-4011",   # connection closed
+    "DPY-4024",   # call timeout exceeded
+    "DPY-6005",   # cannot connect
+    "DPI-1067",   # call timeout exceeded (thick)
+    "DPI-1080",   # connection closed by the call timeout (thick)
+    "ORA-01013",  # call cancelled by the call timeout
+    "ORA-02068",  # severe error from the DB link
+    "ORA-03113",  # end-of-file on communication channel
+    "ORA-03114",  # not connected
+    "ORA-03135",  # connection lost contact
+    "ORA-12170",  # connect timeout
+    "ORA-12514",  # listener doesn't know the service
+    "ORA-12541",  # no listener
+    "ORA-12543",  # destination host unreachable
+    "ORA-12545",  # target host does not exist
+}
+
+
+def unavailable(error):
+    """True if `error` means the database couldn't be reached, as opposed to a failing statement."""
+    if isinstance(error, (OSError, TimeoutError)):
+        return True
+    info = error.args[0] if isinstance(error, oracledb.Error) and error.args else None
+    return getattr(info, "full_code", None) in UNAVAILABLE_CODES
+
+
+remote_breaker = CircuitBreaker("remote", BREAKER_FAILURES, BREAKER_RESET, is_failure=unavailable)
+BREAKERS = {"remote": remote_breaker}
+
+# Applied to every connection handed out (milliseconds, 0 = no limit)
+CALL_TIMEOUTS = {"local": 0, "remote": int(REMOTE_CALL_TIMEOUT * 1000)}
+
+_pools = {}
+
+
+def credentials(source):
+    if source == "remote":
+        return {"user": REMOTE_DB_USER, "password": REMOTE_DB_PASSWORD, "dsn": REMOTE_DB_DSN}
+    return {"user": DB_USER, "password": DB_PASSWORD, "dsn": DB_DSN}
+
+
+def connect_options(source):
+    """Connect / pool-wait limits, so an unreachable remote host fails in seconds, not a TCP timeout."""
+    if source == "remote":
+        return {"tcp_connect_timeout": REMOTE_CONNECT_TIMEOUT}
+    return {}
+
+
+def pool_options(source):
+    if source == "remote":
+        return {"getmode": oracledb.POOL_GETMODE_TIMEDWAIT, "wait_timeout": int(REMOTE_CONNECT_TIMEOUT * 1000)}
+    return {"getmode": oracledb.POOL_GETMODE_WAIT}
+
+
+def init_pools(**overrides):
+    """
+    Create one connection pool per database. Called once at app startup;
+    keyword arguments override POOL_SETTINGS (min, max, increment, timeout,
+    ping_interval, stmtcachesize).
+    """
+    settings = {**POOL_SETTINGS, **overrides}
+    for source in ("local", "remote"):
+        if source in _pools:
+            continue
+        try:
+            _pools[source] = oracledb.create_pool(
+                **credentials(source),
+                **connect_options(source),
+                **pool_options(source),
+                **settings
+            )
+        except oracledb.Error as e:
+            # Fall back to direct connections for this database
+            print(f"Could not create {source} connection pool: {e}")
+    return _pools
+
+
+def close_pools():
+    for source in list(_pools):
+        _pools.pop(source).close(force=True)
+
+
+def get_pool(source="local"):
+    return _pools.get(source)
+
+
+def _acquire(source):
+    """
+    Borrow a pooled connection; conn.close() hands it back to the pool.
+    Raises CircuitOpenError without waiting while the source's circuit is open.
+    """
+    pool = _pools.get(source)
+    breaker = BREAKERS.get(source)
+    with metrics.acquiring(source):
+        if breaker:
+            breaker.before_call()
+        try:
+            if pool is None:
+                conn = oracledb.connect(**credentials(source), **connect_options(source),
+                                        stmtcachesize=POOL_SETTINGS["stmtcachesize"])
+            else:
+                conn = pool.acquire()
+        except Exception as e:
+            if breaker:
+                breaker.record(e)
+            raise
+    conn.call_timeout = CALL_TIMEOUTS.get(source, 0)
+    if breaker and breaker.state == HALF_OPEN:
+        _probe(conn, breaker)
+    return metrics.instrument_connection(conn)
+
+
+def _probe(conn, breaker):
+    """
+    Close a half-open circuit after a round trip on the probe connection,
+    so callers that never go through connection() end the probe too. A
+    pooled connection handed out without one proves nothing: plain acquires
+    don't touch the failure count.
+    """
+    try:
+        conn.ping()
+    except Exception as e:
+        breaker.record(e)
+        conn.close()
+        raise
+    breaker.record_success()
+
+
+def _pool_gauges():
+    for source, pool in list(_pools.items()):
+        yield {"source": source, "state": "busy"}, pool.busy
+        yield {"source": source, "state": "open"}, pool.opened
+        yield {"source": source, "state": "max"}, pool.max
+
+
+metrics.GaugeFunc("db_pool_connections", "Pool connections in use (busy), opened and allowed (max).", _pool_gauges)
+metrics.GaugeFunc("db_pool_waiting", "Callers waiting for a connection.",
+                  lambda: [({"source": source}, metrics.waiting(source)) for source in ("local", "remote")])
+
+
+def get_connection():
+    return _acquire("local")
+
+
+def get_remote_connection():
+    return _acquire("remote")
+
+
+@contextmanager
+def connection(source="local"):
+    """
+    Borrow a connection for the duration of a with-block:
+
+        with connection("remote") as conn:
+            ...
+    """
+    source = source.lower()
+    breaker = BREAKERS.get(source)
+    conn = _acquire(source)
+    try:
+        yield conn
+    except Exception as e:
+        if breaker:
+            breaker.record(e)
+        raise
+    else:
+        if breaker:
+            breaker.record_success()
+    finally:
+        conn.close()
+
+
+@contextmanager
+def remote_link(conn):
+    """
+    Guard statements that read the remote database over the remote_uni DB
+    link from a local connection: same circuit breaker and call timeout as
+    direct remote connections.
+
+        with remote_link(conn):
+            cursor.execute("SELECT ... FROM university_books@remote_uni ...")
+    """
+    previous = conn.call_timeout
+    conn.call_timeout = CALL_TIMEOUTS["remote"]
+    try:
+        with remote_breaker.guard():
+            yield conn
+    finally:
+        conn.call_timeout = previous
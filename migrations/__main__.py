@@ -0,0 +1,37 @@
+"""
+Schema migration CLI.
+
+Usage:
+    python -m migrations upgrade [--target N] [--remote]
+    python -m migrations status [--remote]
+    python -m migrations explain [--remote]
+"""
+import argparse
+import sys
+
+from dbconnections.dbconnections import get_connection, get_remote_connection
+from migrations import plan_check, runner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Manage the library database schema.")
+    parser.add_argument("command", choices=["upgrade", "status", "explain"])
+    parser.add_argument("--target", type=int, help="upgrade only up to this version")
+    parser.add_argument("--remote", action="store_true", help="run against the remote database")
+    args = parser.parse_args(argv)
+
+    conn = get_remote_connection() if args.remote else get_connection()
+    try:
+        if args.command == "upgrade":
+            runner.upgrade(conn, target=args.target)
+        elif args.command == "status":
+            runner.status(conn)
+        elif args.command == "explain":
+            return 1 if plan_check.check(conn) else 0
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Version 1: the application tables (users, university_books, user_library).
+
+Tables that already exist are left untouched.
+"""
+from migrations.ddl import execute_ddl
+
+DDL = [
+    """
+        CREATE TABLE users (
+            user_id        NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            name           VARCHAR2(100) NOT NULL,
+            email          VARCHAR2(100) NOT NULL UNIQUE,
+            password_hash  VARCHAR2(255) NOT NULL,
+            role           VARCHAR2(20) NOT NULL,
+            profile_image  BLOB,
+            created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE university_books (
+            book_id         NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            title           VARCHAR2(150),
+            author          VARCHAR2(100),
+            university      VARCHAR2(100),
+            department      VARCHAR2(100),
+            year_published  NUMBER(4),
+            availability    VARCHAR2(20),
+            pdf_file        BLOB,
+            uploaded_by     NUMBER,
+            CONSTRAINT fk_uploaded_by FOREIGN KEY (uploaded_by)
+                REFERENCES users(user_id)
+        )
+    """,
+    """
+        CREATE TABLE user_library (
+            user_id        NUMBER NOT NULL,
+            book_id        NUMBER NOT NULL,
+            title          VARCHAR2(255),
+            author         VARCHAR2(255),
+            university     VARCHAR2(255),
+            department     VARCHAR2(255),
+            year_published NUMBER,
+            pdf_file       BLOB,
+            added_at       DATE,
+            source         VARCHAR2(10),
+            CONSTRAINT user_library_pk PRIMARY KEY (user_id, book_id)
+        )
+    """,
+]
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    try:
+        for statement in DDL:
+            execute_ddl(cursor, statement)
+    finally:
+        cursor.close()
@@ -0,0 +1,24 @@
+"""
+Version 5: progress table for resumable bulk imports (commands/bulk_import.py).
+
+The row count is updated in the same transaction as each imported batch,
+so a resumed import never inserts a batch twice.
+"""
+from migrations.ddl import execute_ddl
+
+DDL = """
+    CREATE TABLE bulk_import_progress (
+        manifest_sha256  CHAR(64) PRIMARY KEY,
+        manifest_name    VARCHAR2(255),
+        rows_done        NUMBER DEFAULT 0 NOT NULL,
+        updated_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    try:
+        execute_ddl(cursor, DDL)
+    finally:
+        cursor.close()
@@ -0,0 +1,31 @@
+"""
+Version 3: indexes for the predicates and orderings the routes use.
+
+- LOWER(...) function-based indexes match the case-insensitive filters
+- (title, book_id) and (name, user_id) serve the keyset-paginated listings
+- user_library(user_id, source) serves my_library / remote_library
+- university_books(uploaded_by) backs the foreign key to users
+"""
+from migrations.ddl import execute_ddl
+
+INDEXES = [
+    "CREATE INDEX ub_title_lower_idx ON university_books (LOWER(title))",
+    "CREATE INDEX ub_author_lower_idx ON university_books (LOWER(author))",
+    "CREATE INDEX ub_university_lower_idx ON university_books (LOWER(university))",
+    "CREATE INDEX ub_department_lower_idx ON university_books (LOWER(department))",
+    "CREATE INDEX ub_title_id_idx ON university_books (title, book_id)",
+    "CREATE INDEX ub_uploaded_by_idx ON university_books (uploaded_by)",
+    "CREATE INDEX users_email_lower_idx ON users (LOWER(email))",
+    "CREATE INDEX users_name_id_idx ON users (name, user_id)",
+    "CREATE INDEX ul_user_source_idx ON user_library (user_id, source)",
+]
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    try:
+        for statement in INDEXES:
+            if execute_ddl(cursor, statement):
+                print(f"  {statement}")
+    finally:
+        cursor.close()
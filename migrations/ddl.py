@@ -0,0 +1,22 @@
+import oracledb
+
+# ORA- codes meaning the object a DDL statement creates is already there
+ALREADY_EXISTS = (
+    955,    # name is already used by an existing object
+    1408,   # such column list already indexed
+    1430,   # column being added already exists in table
+    2260,   # table can have only one primary key
+    2275,   # such a referential constraint already exists
+    12000,  # a materialized view log already exists on table
+)
+
+
+def execute_ddl(cursor, statement):
+    """Run a DDL statement, treating "already exists" errors as success. Returns True if it ran."""
+    try:
+        cursor.execute(statement)
+        return True
+    except oracledb.DatabaseError as e:
+        if e.args[0].code in ALREADY_EXISTS:
+            return False
+        raise
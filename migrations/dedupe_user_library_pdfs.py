@@ -0,0 +1,84 @@
+"""
+Move the PDF copies held in user_library into the content-addressed pdf_store.
+
+Creates pdf_store and user_library.pdf_sha256 if needed, then for every row
+that still carries its own pdf_file: stores the bytes once under their
+SHA-256, points the row at it and clears the copy.
+
+Usage:
+    python -m migrations.dedupe_user_library_pdfs [--batch-size 50]
+"""
+import argparse
+
+from dbconnections.dbconnections import get_connection
+from migrations.ddl import execute_ddl
+from services import pdf_store
+
+DDL = [
+    """
+        CREATE TABLE pdf_store (
+            sha256      CHAR(64) PRIMARY KEY,
+            pdf_file    BLOB NOT NULL,
+            byte_size   NUMBER,
+            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    "ALTER TABLE user_library ADD (pdf_sha256 CHAR(64))",
+]
+
+
+def upgrade(conn, batch_size=50):
+    cursor = conn.cursor()
+    try:
+        for statement in DDL:
+            execute_ddl(cursor, statement)
+
+        cursor.execute("""
+            SELECT COUNT(*), NVL(SUM(DBMS_LOB.GETLENGTH(pdf_file)), 0)
+            FROM user_library
+            WHERE pdf_file IS NOT NULL AND pdf_sha256 IS NULL
+        """)
+        copies, copy_bytes = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*), NVL(SUM(byte_size), 0) FROM pdf_store")
+        stored_before, stored_bytes_before = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT user_id, book_id
+            FROM user_library
+            WHERE pdf_file IS NOT NULL AND pdf_sha256 IS NULL
+        """)
+        keys = cursor.fetchall()
+
+        for done, (user_id, book_id) in enumerate(keys, start=1):
+            params = {"user_id": user_id, "book_id": book_id}
+            sha = pdf_store.store_from(cursor, "user_library", "user_id = :user_id AND book_id = :book_id", params)
+            cursor.execute("""
+                UPDATE user_library
+                SET pdf_sha256 = :sha, pdf_file = NULL
+                WHERE user_id = :user_id AND book_id = :book_id
+            """, {"sha": sha, **params})
+            if done % batch_size == 0:
+                conn.commit()
+                print(f"  {done}/{len(keys)} rows migrated")
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*), NVL(SUM(byte_size), 0) FROM pdf_store")
+        stored_after, stored_bytes_after = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    added_bytes = stored_bytes_after - stored_bytes_before
+    print(f"Migrated {copies} PDF copies into {stored_after - stored_before} new pdf_store entries")
+    print(f"Freed {(copy_bytes - added_bytes) / 1024 / 1024:.1f} MB of duplicate BLOB data")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--batch-size", type=int, default=50, help="rows per commit")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        upgrade(conn, batch_size=args.batch_size)
+    finally:
+        conn.close()
@@ -0,0 +1,56 @@
+"""
+Create the Oracle Text CONTEXT index used by the ranked "All Fields" search.
+
+A MULTI_COLUMN_DATASTORE indexes title, author, university and department
+together under a single index on university_books(title), kept in sync on
+commit. Needs the CTXAPP role. Without Oracle Text the app falls back to
+its in-process inverted index, so this migration is optional.
+
+Usage:
+    python -m migrations.fulltext_index [--remote]
+"""
+import argparse
+
+from dbconnections.dbconnections import get_connection, get_remote_connection
+
+DATASTORE = "BOOKS_FTS_DS"
+INDEX = "BOOKS_FTS_IDX"
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM ctx_user_preferences WHERE pre_name = :1", (DATASTORE,))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"""
+                BEGIN
+                    ctx_ddl.create_preference('{DATASTORE}', 'MULTI_COLUMN_DATASTORE');
+                    ctx_ddl.set_attribute('{DATASTORE}', 'COLUMNS', 'title, author, university, department');
+                END;
+            """)
+            print(f"Created datastore preference {DATASTORE}")
+
+        cursor.execute("SELECT COUNT(*) FROM user_indexes WHERE index_name = :1", (INDEX,))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"""
+                CREATE INDEX {INDEX} ON university_books (title)
+                INDEXTYPE IS CTXSYS.CONTEXT
+                PARAMETERS ('DATASTORE {DATASTORE} SYNC (ON COMMIT)')
+            """)
+            print(f"Created CONTEXT index {INDEX}")
+        else:
+            print(f"{INDEX} already exists")
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the Oracle Text index for catalog search.")
+    parser.add_argument("--remote", action="store_true", help="run against the remote database")
+    args = parser.parse_args()
+
+    conn = get_remote_connection() if args.remote else get_connection()
+    try:
+        upgrade(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,53 @@
+"""
+Version 8: the manuscript content index (services/content_index.py).
+
+- university_books.pdf_changed_at, set on insert and by a trigger whenever
+  the PDF is replaced, tells the indexer which BLOBs are new or changed
+- book_text holds each book's extracted text and the pdf_changed_at it was
+  extracted from; a book whose values differ still has to be (re)indexed,
+  so an interrupted run resumes where it stopped
+- book_text_terms (token, book_id) -> term frequency, index-organized so a
+  token lookup reads one contiguous range
+"""
+from migrations.ddl import execute_ddl
+
+STATEMENTS = [
+    "ALTER TABLE university_books ADD (pdf_changed_at TIMESTAMP DEFAULT SYSTIMESTAMP)",
+    """
+        CREATE OR REPLACE TRIGGER university_books_pdf_changed
+        BEFORE UPDATE OF pdf_file ON university_books
+        FOR EACH ROW
+        BEGIN
+            :new.pdf_changed_at := SYSTIMESTAMP;
+        END;
+    """,
+    """
+        CREATE TABLE book_text (
+            book_id         NUMBER PRIMARY KEY,
+            pdf_changed_at  TIMESTAMP,
+            content         CLOB,
+            term_count      NUMBER,
+            error           VARCHAR2(400),
+            indexed_at      TIMESTAMP DEFAULT SYSTIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE book_text_terms (
+            token       VARCHAR2(64),
+            book_id     NUMBER,
+            frequency   NUMBER,
+            CONSTRAINT book_text_terms_pk PRIMARY KEY (token, book_id)
+        ) ORGANIZATION INDEX
+    """,
+    "CREATE INDEX book_text_terms_book_idx ON book_text_terms (book_id)",
+]
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    try:
+        for statement in STATEMENTS:
+            if execute_ddl(cursor, statement):
+                print(f"  {' '.join(statement.split())[:80]}")
+    finally:
+        cursor.close()
@@ -0,0 +1,116 @@
+"""
+Run EXPLAIN PLAN for the SQL each route issues and report full table scans.
+
+The catalog statements are captured from routes.books.query_books itself,
+so the check follows the code; the others mirror the statements in the
+route modules.
+"""
+from routes.books import query_books, ALLOWED_SORT
+from services import catalog, facets
+
+ROUTE_QUERIES = [
+    ("auth.login", "SELECT user_id, name, email, password_hash, role FROM users WHERE email=:1",
+     ["student@example.edu"]),
+    ("admin.admin_dashboard", """
+        SELECT user_id, name, email, role FROM users
+        WHERE (:pattern IS NULL OR LOWER(name) LIKE :pattern OR LOWER(email) LIKE :pattern OR user_id = :user_id)
+        ORDER BY name ASC NULLS LAST, user_id ASC FETCH FIRST :page_limit ROWS ONLY
+    """, {"pattern": None, "user_id": None, "page_limit": 51}),
+    ("librarian.dashboard", *catalog.search_query(sort="title", limit=51)),
+    ("librarian.view_book", "SELECT title, pdf_file FROM university_books WHERE book_id=:1", [1]),
+    ("user_library.my_library", """
+        SELECT book_id, title, author, university, department, year_published, source
+        FROM user_library WHERE user_id = :1
+    """, [1]),
+    ("user_library.remote_library", """
+        SELECT book_id, source FROM user_library WHERE user_id = :1 AND UPPER(source) = 'REMOTE'
+    """, [1]),
+    ("profile.profile_image", "SELECT profile_image FROM users WHERE user_id = :1", [1]),
+    ("books.index facets", facets.FACET_COUNTS_SQL,
+     dict.fromkeys(["university", "department", "year_published",
+                    "eq_university", "eq_department", "eq_year_published"])),
+]
+
+
+class _RecordingConnection:
+    """Stands in for a connection and keeps the statements executed on it."""
+
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+def catalog_queries():
+    """One example of each distinct catalog search statement (first, next and previous pages)."""
+    positions = {
+        "first": None,
+        "next": {"v": "m", "id": 1, "back": False},
+        "previous": {"v": "m", "id": 1, "back": True},
+    }
+    queries, seen = [], set()
+    for sort in ALLOWED_SORT:
+        for page, position in positions.items():
+            recorder = _RecordingConnection()
+            query_books(recorder, "Local", search_type="title", keyword="data", sort=sort,
+                        position=position, limit=51)
+            sql, params = recorder.statements[0]
+            if sql not in seen:
+                seen.add(sql)
+                queries.append((f"books.index sort={sort} page={page}", sql, params))
+    for column, value in [("university", "University 1"), ("department", "Physics"), ("year_published", 2020)]:
+        recorder = _RecordingConnection()
+        query_books(recorder, "Local", sort="title", limit=51, chosen={column: value})
+        sql, params = recorder.statements[0]
+        queries.append((f"books.index facet={column}", sql, params))
+    return queries
+
+
+def explain(conn, sql, params):
+    """Return the plan lines for a statement as (operation, options, object_name)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM plan_table WHERE statement_id = 'plan_check'")
+        cursor.execute("EXPLAIN PLAN SET STATEMENT_ID = 'plan_check' FOR " + sql, params or [])
+        cursor.execute("""
+            SELECT operation, options, object_name
+            FROM plan_table
+            WHERE statement_id = 'plan_check'
+            ORDER BY id
+        """)
+        plan = cursor.fetchall()
+        conn.rollback()
+        return plan
+    finally:
+        cursor.close()
+
+
+def check(conn):
+    """Print every route statement that does a full table scan. Returns the number found."""
+    full_scans = 0
+    for name, sql, params in ROUTE_QUERIES + catalog_queries():
+        plan = explain(conn, sql, params)
+        scanned = [obj for operation, options, obj in plan if operation == "TABLE ACCESS" and options == "FULL"]
+        if scanned:
+            full_scans += 1
+            print(f"FULL SCAN  {name}: {', '.join(scanned)}")
+        else:
+            print(f"ok         {name}")
+    print(f"\n{full_scans} statement(s) with full table scans")
+    return full_scans
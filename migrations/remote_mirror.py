@@ -0,0 +1,80 @@
+"""
+Version 7: change tracking on university_books and the local mirror of the
+remote catalog (services/remote_mirror.py).
+
+On every database:
+- university_books.updated_at, set on insert and by a trigger whenever the
+  metadata changes, with an index for "changed since" scans
+- book_deletions, filled by a delete trigger, so deletes can be replayed
+
+Used on the local database:
+- remote_books_mirror, the remote metadata (no PDFs) with the same search
+  indexes as university_books
+- mirror_sync_state, the high-water marks of the last sync
+"""
+from migrations.ddl import execute_ddl
+
+STATEMENTS = [
+    "ALTER TABLE university_books ADD (updated_at TIMESTAMP DEFAULT SYSTIMESTAMP)",
+    "CREATE INDEX ub_updated_at_idx ON university_books (updated_at)",
+    """
+        CREATE OR REPLACE TRIGGER university_books_changed
+        BEFORE UPDATE OF title, author, university, department, year_published ON university_books
+        FOR EACH ROW
+        BEGIN
+            :new.updated_at := SYSTIMESTAMP;
+        END;
+    """,
+    """
+        CREATE TABLE book_deletions (
+            book_id     NUMBER NOT NULL,
+            deleted_at  TIMESTAMP DEFAULT SYSTIMESTAMP NOT NULL
+        )
+    """,
+    "CREATE INDEX book_deletions_at_idx ON book_deletions (deleted_at)",
+    """
+        CREATE OR REPLACE TRIGGER university_books_deleted
+        AFTER DELETE ON university_books
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO book_deletions (book_id) VALUES (:old.book_id);
+        END;
+    """,
+    """
+        CREATE TABLE remote_books_mirror (
+            book_id         NUMBER PRIMARY KEY,
+            title           VARCHAR2(150),
+            author          VARCHAR2(100),
+            university      VARCHAR2(100),
+            department      VARCHAR2(100),
+            year_published  NUMBER(4),
+            updated_at      TIMESTAMP
+        )
+    """,
+    "CREATE INDEX rbm_title_lower_idx ON remote_books_mirror (LOWER(title))",
+    "CREATE INDEX rbm_author_lower_idx ON remote_books_mirror (LOWER(author))",
+    "CREATE INDEX rbm_university_lower_idx ON remote_books_mirror (LOWER(university))",
+    "CREATE INDEX rbm_department_lower_idx ON remote_books_mirror (LOWER(department))",
+    "CREATE INDEX rbm_title_id_idx ON remote_books_mirror (title, book_id)",
+    "CREATE INDEX rbm_facets_idx ON remote_books_mirror (university, department, year_published)",
+    "CREATE INDEX rbm_updated_at_idx ON remote_books_mirror (updated_at)",
+    """
+        CREATE TABLE mirror_sync_state (
+            name            VARCHAR2(30) PRIMARY KEY,
+            max_book_id     NUMBER,
+            changed_since   TIMESTAMP,
+            deleted_since   TIMESTAMP,
+            synced_at       TIMESTAMP
+        )
+    """,
+]
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    try:
+        for statement in STATEMENTS:
+            if execute_ddl(cursor, statement):
+                print(f"  {' '.join(statement.split())[:80]}")
+    finally:
+        cursor.close()
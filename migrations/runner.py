@@ -0,0 +1,74 @@
+"""
+Versioned schema migrations.
+
+Applied versions are recorded in the schema_migrations table of each
+database, so running the upgrade again only applies what is missing.
+"""
+from migrations import (base_schema, bulk_import_progress, catalog_facets, catalog_indexes, dedupe_user_library_pdfs,
+                        fulltext_index, manuscript_text, remote_mirror)
+from migrations.ddl import execute_ddl
+
+# (version, name, upgrade function, optional)
+# Optional migrations (e.g. Oracle Text, which needs CTXAPP) may fail without stopping the run.
+MIGRATIONS = [
+    (1, "base_schema", base_schema.upgrade, False),
+    (2, "user_library_pdf_store", dedupe_user_library_pdfs.upgrade, False),
+    (3, "catalog_indexes", catalog_indexes.upgrade, False),
+    (4, "fulltext_index", fulltext_index.upgrade, True),
+    (5, "bulk_import_progress", bulk_import_progress.upgrade, False),
+    (6, "catalog_facets", catalog_facets.upgrade, False),
+    (7, "remote_mirror", remote_mirror.upgrade, False),
+    (8, "manuscript_text", manuscript_text.upgrade, False),
+]
+
+
+def ensure_version_table(cursor):
+    execute_ddl(cursor, """
+        CREATE TABLE schema_migrations (
+            version     NUMBER PRIMARY KEY,
+            name        VARCHAR2(100) NOT NULL,
+            applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    try:
+        ensure_version_table(cursor)
+        cursor.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cursor}
+    finally:
+        cursor.close()
+
+
+def upgrade(conn, target=None):
+    """Apply every pending migration up to `target` (all by default), in version order."""
+    done = applied_versions(conn)
+    for version, name, migrate, optional in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+
+        print(f"Applying {version}: {name}")
+        try:
+            migrate(conn)
+        except Exception as e:
+            conn.rollback()
+            if not optional:
+                raise
+            print(f"  skipped optional migration {name}: {e}")
+            continue
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (:1, :2)", (version, name))
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def status(conn):
+    done = applied_versions(conn)
+    for version, name, _, optional in MIGRATIONS:
+        state = "applied" if version in done else "pending"
+        print(f"{version:>3}  {name:<28} {state}{' (optional)' if optional else ''}")
@@ -1,6 +1,9 @@
+import oracledb
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from werkzeug.security import check_password_hash
 from dbconnections.dbconnections import get_connection
+from routes.profile import invalidate_avatar
+from services.pagination import page_size, decode_token, order_by, keyset_condition, build_page
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -75,41 +78,44 @@ def admin_dashboard():
         return redirect(url_for("admin.admin_login"))
 
     search = request.args.get("search", "").strip()
+    size = page_size(request.args)
+    position = decode_token(request.args.get("page"))
+    backwards = bool(position and position.get("back"))
+
+    # An empty search binds NULLs, so the text only varies with the page position
+    query = """
+        SELECT user_id, name, email, role FROM users
+        WHERE (:pattern IS NULL OR LOWER(name) LIKE :pattern OR LOWER(email) LIKE :pattern OR user_id = :user_id)"""
+    params = {
+        "pattern": f"%{search.lower()}%" if search else None,
+        # If search is numeric, allow searching by ID as well
+        "user_id": int(search) if search.isdigit() else None,
+        "page_limit": size + 1,
+    }
+
+    if position:
+        condition, binds = keyset_condition("name", "user_id", position)
+        query += " AND " + condition
+        params.update(binds)
+
+    query += order_by("name", "user_id", backwards)
+    query += " FETCH FIRST :page_limit ROWS ONLY"
 
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
-        if search:
-            # If search is numeric, allow searching by ID as well
-            if search.isdigit():
-                query = """
-                    SELECT user_id, name, email, role
-                    FROM users
-                    WHERE user_id = :1
-                       OR LOWER(name) LIKE :2
-                       OR LOWER(email) LIKE :3
-                    ORDER BY name
-                """
-                cursor.execute(query, (int(search), f"%{search.lower()}%", f"%{search.lower()}%"))
-            else:
-                query = """
-                    SELECT user_id, name, email, role
-                    FROM users
-                    WHERE LOWER(name) LIKE :1
-                       OR LOWER(email) LIKE :2
-                    ORDER BY name
-                """
-                cursor.execute(query, (f"%{search.lower()}%", f"%{search.lower()}%"))
-        else:
-            cursor.execute("SELECT user_id, name, email, role FROM users ORDER BY name")
-
-        users = cursor.fetchall()
+        cursor.setinputsizes(pattern=oracledb.DB_TYPE_VARCHAR, user_id=oracledb.DB_TYPE_NUMBER)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
-    return render_template("admin/dashboard.html", users=users, search=search)
+    users, next_token, prev_token = build_page(rows, size, position, lambda u: (u[1], u[0], None))
+
+    return render_template("admin/dashboard.html", users=users, search=search,
+                           next_token=next_token, prev_token=prev_token)
 
 
 # -----------------------------
@@ -164,6 +170,7 @@ def delete_user(user_id):
     try:
         cursor.execute("DELETE FROM users WHERE user_id=:1", (user_id,))
         conn.commit()
+        invalidate_avatar(user_id)
     finally:
         cursor.close()
         conn.close()
@@ -1,6 +1,8 @@
+import oracledb
 from flask import Blueprint, render_template, request, redirect, session, flash, url_for
 from werkzeug.security import generate_password_hash, check_password_hash
 from dbconnections.dbconnections import get_connection
+from services.lob_stream import write_stream
 from datetime import datetime
 
 bp = Blueprint("auth", __name__, template_folder="templates")
@@ -24,7 +26,7 @@ def register():
         email = request.form.get("email", "").strip().lower()
         password = request.form.get("password", "")
         profile_file = request.files.get("profile_image")
-        image_bytes = profile_file.read() if profile_file and profile_file.filename else None
+        has_image = bool(profile_file and profile_file.filename)
 
         # Basic validation
         if not (name and email and password):
@@ -43,15 +45,20 @@ def register():
                 flash("Email already exists!", "error")
                 return render_template("register.html")
 
-            # Insert new user with optional profile image
+            # Insert new user; an uploaded image is streamed into an empty BLOB
+            image_out = cursor.var(oracledb.DB_TYPE_BLOB)
             cursor.execute(
-                """
+                f"""
                 INSERT INTO users
                 (name, email, password_hash, role, profile_image, created_at)
-                VALUES (:1, :2, :3, :4, :5, :6)
+                VALUES (:name, :email, :password_hash, :role, {"EMPTY_BLOB()" if has_image else "NULL"}, :created_at)
+                RETURNING profile_image INTO :image_out
                 """,
-                (name, email, password_hash, role, image_bytes, datetime.now())
+                {"name": name, "email": email, "password_hash": password_hash, "role": role,
+                 "created_at": datetime.now(), "image_out": image_out}
             )
+            if has_image:
+                write_stream(image_out.getvalue()[0], profile_file.stream)
             conn.commit()
             flash("Account created successfully! Please login.", "success")
             return redirect(url_for("auth.login"))
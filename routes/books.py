@@ -1,54 +1,172 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from dbconnections.dbconnections import get_connection, get_remote_connection
+import heapq
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import islice
+
+import oracledb
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from markupsafe import Markup
+from dbconnections.dbconnections import (get_connection, get_remote_connection, connection, remote_breaker,
+                                         CircuitOpenError)
+from services.pagination import page_size, decode_token, build_page
+from services import (autocomplete, catalog, content_index, facets, fragment_cache, fulltext, metrics,
+                      remote_mirror, result_cache)
 
 bp = Blueprint("books", __name__)
 
-def query_books(conn, source_name, search_type=None, keyword=None, sort=None):
+ALLOWED_SORT = catalog.SORT_COLUMNS
+
+# Search types answered by a ranked index instead of the catalog columns
+RANKED_SEARCHES = ("fulltext", "content")
+
+# Federated search: each source runs on this bounded pool and gets its own timeout
+SOURCE_TIMEOUT = float(os.environ.get("SOURCE_TIMEOUT", 5))  # seconds
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("FEDERATED_WORKERS", 4)),
+                               thread_name_prefix="federated-search")
+
+def book_query(source_name, search_type=None, keyword=None, sort=None, position=None, limit=None, chosen=None,
+               table="university_books"):
     """
-    Execute book query on a given connection and return list of dictionaries.
-    Adds a 'source' field to indicate local or remote DB.
+    Build the catalog SELECT for one database. Returns (query, params).
+    With a position (decoded page token) only rows after it, or before it
+    for a backwards token, are selected; limit caps the row count and
+    chosen ({column: value}) holds the selected facets and table is the
+    catalog table to read (catalog.SEARCH_TABLES).
+    The SQL text only varies with the page direction and selected facets
+    (see catalog.search_query).
+    """
+    # Rows with the same (sort, book_id) in both databases are ordered by source name
+    src = position and position.get("src")
+    backwards = bool(position and position.get("back"))
+    inclusive = bool(src) and (source_name < src if backwards else source_name > src)
+    return catalog.search_query({search_type: keyword} if search_type else None, sort, position, limit, inclusive,
+                                chosen, table)
+
+
+def query_books(conn, source_name, search_type=None, keyword=None, sort=None, position=None, limit=None,
+                chosen=None, table="university_books"):
+    """
+    Execute book query on a given connection and return a list of
+    catalog.Book records tagged with their source (Local or Remote).
     """
     cursor = conn.cursor()
-    query = """
-        SELECT book_id, title, author, university, department, year_published
-        FROM university_books
+    try:
+        query, params = book_query(source_name, search_type, keyword, sort, position, limit, chosen, table)
+        return catalog.fetch_books(cursor, query, params, source_name, rows=limit,
+                                   input_sizes=catalog.SEARCH_INPUT_SIZES)
+    finally:
+        cursor.close()
+
+def query_mirror(search_type, keyword, sort, position, limit, chosen=None):
+    """
+    Answer a remote search from the local mirror (services/remote_mirror.py).
+    Returns None when the mirror is too stale or can't be read.
+    """
+    if search_type in RANKED_SEARCHES:
+        return None
+    try:
+        with connection("local") as conn:
+            if not remote_mirror.fresh(conn):
+                return None
+            conn.call_timeout = int(SOURCE_TIMEOUT * 1000)
+            return query_books(conn, source_name="Remote", search_type=search_type, keyword=keyword, sort=sort,
+                               position=position, limit=limit, chosen=chosen, table=remote_mirror.TABLE)
+    except oracledb.DatabaseError as e:
+        print(f"Remote mirror unavailable, querying live: {e}")
+        remote_mirror.stale()
+        return None
+
+
+def query_source(source, search_type, keyword, sort, position, limit, chosen=None):
+    """Run one source's part of a federated search on a pooled connection."""
+    if source == "remote":
+        books = query_mirror(search_type, keyword, sort, position, limit, chosen)
+        if books is not None:
+            return books
+    with connection(source) as conn:
+        # Let the server abandon the call once nobody is waiting for it
+        conn.call_timeout = int(SOURCE_TIMEOUT * 1000)
+        if search_type == "fulltext":
+            return fulltext.search(conn, source.capitalize(), keyword, limit=limit)
+        if search_type == "content":
+            return content_index.search(conn, source.capitalize(), keyword, limit=limit)
+        return query_books(conn, source_name=source.capitalize(), search_type=search_type, keyword=keyword,
+                           sort=sort, position=position, limit=limit, chosen=chosen)
+
+
+def facet_source(source, search_type, keyword, chosen):
+    """Facet counts for one source of a federated search."""
+    with connection(source) as conn:
+        conn.call_timeout = int(SOURCE_TIMEOUT * 1000)
+        return facets.counts(conn, source.capitalize(), {search_type: keyword} if search_type else None, chosen)
+
+
+def _sort_key(sort):
+    # Matches the SQL ORDER BY: NULLs last, then book_id, then source name
+    return lambda book: (book[sort] is None, book[sort], book["book_id"], book["source"])
+
+
+def page_key(sort):
+    return lambda book: (book[sort], book["book_id"], book["source"])
+
+
+def _gather(futures, started):
+    """Wait for per-source futures within SOURCE_TIMEOUT. Returns (results, errors)."""
+    results, errors = [], {}
+    for source, future in futures.items():
+        remaining = SOURCE_TIMEOUT - (time.monotonic() - started)
+        try:
+            results.append(future.result(timeout=max(remaining, 0)))
+        except FutureTimeoutError:
+            future.cancel()
+            errors[source] = f"timed out after {SOURCE_TIMEOUT:g}s"
+        except Exception as e:
+            errors[source] = str(e)
+    return results, errors
+
+
+def federated_query(sources, search_type=None, keyword=None, sort=None, position=None, limit=None, chosen=None):
+    """
+    Run query_books against every source concurrently.
+    Returns (books, errors): books is a lazy merge of the per-source results
+    that keeps the global ORDER BY, errors maps a failed source to its message.
+    """
+    sort = sort if sort in ALLOWED_SORT else "book_id"
+    started = time.monotonic()
+    futures = {
+        source: _executor.submit(metrics.for_request(query_source), source, search_type, keyword, sort, position,
+                                 limit, chosen)
+        for source in sources
+    }
+    results, errors = _gather(futures, started)
+    return merge_results(results, search_type, sort, position), errors
+
+
+def federated_facets(sources, search_type=None, keyword=None, chosen=None):
     """
-    params = []
-
-    if keyword:
-        keyword_param = f"%{keyword.lower()}%"
-        if search_type == "university":
-            query += " WHERE LOWER(university) LIKE :keyword"
-        elif search_type == "author":
-            query += " WHERE LOWER(author) LIKE :keyword"
-        elif search_type == "title":
-            query += " WHERE LOWER(title) LIKE :keyword"
-        elif search_type == "department":
-            query += " WHERE LOWER(department) LIKE :keyword"
-        elif search_type == "year_published":
-            query += " WHERE TO_CHAR(year_published) LIKE :keyword"
-        params = [keyword_param]
-
-    if sort:
-        allowed_sort = ["book_id", "title", "author", "university", "department", "year_published"]
-        if sort in allowed_sort:
-            query += f" ORDER BY {sort}"
-
-    cursor.execute(query, params)
-    books = [
-        {
-            "book_id": r[0],
-            "title": r[1],
-            "author": r[2],
-            "university": r[3],
-            "department": r[4],
-            "year_published": r[5],
-            "source": source_name  # <--- add this
-        }
-        for r in cursor
-    ]
-    cursor.close()
-    return books
+    Facet counts summed over every source, as facets.top() listings.
+    Returns (listing, errors) like federated_query.
+    """
+    started = time.monotonic()
+    futures = {source: _executor.submit(metrics.for_request(facet_source), source, search_type, keyword, chosen)
+               for source in sources}
+    results, errors = _gather(futures, started)
+    total = {name: sum((counts[name] for counts in results), Counter()) for name in facets.FACETS}
+    return facets.top(total), errors
+
+
+def merge_results(results, search_type=None, sort=None, position=None):
+    """Lazily merge per-source result lists, each already in the query's order."""
+    if search_type in RANKED_SEARCHES:
+        # Ranked results: best score first across all sources
+        return heapq.merge(*results, key=lambda book: -book["score"])
+
+    sort = sort if sort in ALLOWED_SORT else "book_id"
+    backwards = bool(position and position.get("back"))
+    return heapq.merge(*results, key=_sort_key(sort), reverse=backwards)
+
 
 @bp.route("/")
 def index():
@@ -57,29 +175,90 @@ def index():
     sort = request.args.get("sort")
     db_source = request.args.get("db_source", "local")  # local, remote, all
 
-    all_books = []
+    size = page_size(request.args)
+    position = decode_token(request.args.get("page"))
+    sort_col = sort if sort in ALLOWED_SORT else "book_id"
+    chosen = facets.selected(request.args)
 
-    # Query local DB
-    if db_source in ["local", "all"]:
-        try:
-            conn = get_connection()
-            all_books.extend(query_books(conn, source_name="Local", search_type=search_type, keyword=keyword, sort=sort))
-            conn.close()
-        except Exception as e:
-            flash(f"Failed to fetch local books: {e}", "error")
+    sources = ["local", "remote"] if db_source == "all" else [db_source if db_source == "remote" else "local"]
 
-    # Query remote DB
-    if db_source in ["remote", "all"]:
-        try:
-            conn = get_remote_connection()
-            all_books.extend(query_books(conn, source_name="Remote", search_type=search_type, keyword=keyword, sort=sort))
-            conn.close()
-        except Exception as e:
-            flash(f"Failed to fetch remote books: {e}", "error")
+    # The rendered table is cached as a whole: a hit skips the search and the Jinja loop
+    table_key = fragment_cache.key("books_table", sources)
+    books_table = fragment_cache.lookup("books_table", table_key)
+    errors = {}
+
+    if books_table is None:
+        cache_key = result_cache.search_key(sources, search_type, keyword, sort_col, request.args.get("page"), size,
+                                            chosen)
+        cached = result_cache.lookup(cache_key)
+
+        if cached:
+            all_books, next_token, prev_token = cached
+        elif search_type in RANKED_SEARCHES and keyword:
+            # Ranked search (metadata or manuscript text): shows the best page_size matches
+            merged, errors = federated_query(sources, search_type=search_type, keyword=keyword, limit=size)
+            all_books, next_token, prev_token = list(islice(merged, size)), None, None
+        else:
+            merged, errors = federated_query(sources, search_type=search_type, keyword=keyword, sort=sort_col,
+                                             position=position, limit=size + 1, chosen=chosen)
+            all_books, next_token, prev_token = build_page(list(islice(merged, size + 1)), size, position,
+                                                           page_key(sort_col))
+
+        books_table = Markup(render_template("books_table.html", books=all_books,
+                                             next_token=next_token, prev_token=prev_token))
+        # Partial results, and ranked results from an index still being rebuilt, are never cached
+        index_current = search_type != "fulltext" or all(fulltext.current(source.capitalize()) for source in sources)
+        if not errors and index_current:
+            if not cached:
+                result_cache.store(cache_key, [all_books, next_token, prev_token])
+            fragment_cache.store(table_key, books_table)
+
+    for source, error in errors.items():
+        if len(errors) < len(sources):
+            flash(f"Showing partial results: {source} books unavailable ({error}).", "warning")
+        else:
+            flash(f"Failed to fetch {source} books: {error}", "error")
+
+    # Facet counts don't depend on the page, so they are cached separately
+    # (only from the sources that answered the search)
+    facet_listing = None
+    facet_sources = [source for source in sources if source not in errors]
+    if search_type not in RANKED_SEARCHES and facet_sources:
+        facet_key = result_cache.facets_key(facet_sources, search_type, keyword, chosen)
+        facet_listing = result_cache.lookup(facet_key)
+        if facet_listing is None:
+            facet_listing, facet_errors = federated_facets(facet_sources, search_type, keyword, chosen)
+            if not facet_errors:
+                result_cache.store(facet_key, facet_listing)
+
+    return render_template("index.html", books_table=books_table, db_source=db_source,
+                           facets=facet_listing, chosen=chosen)
 
-    return render_template("index.html", books=all_books, db_source=db_source)
 
 
+# ---------------------------
+# Search box suggestions
+# ---------------------------
+MAX_SUGGESTIONS = 20
+
+
+@bp.route("/autocomplete")
+def suggest():
+    """JSON suggestions for ?field=title|author|university|department&q=<prefix>&limit=10"""
+    field = request.args.get("field", "title")
+    if field not in autocomplete.FIELDS:
+        return jsonify(error=f"field must be one of {', '.join(autocomplete.FIELDS)}"), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), MAX_SUGGESTIONS))
+    except ValueError:
+        limit = 10
+    prefix = request.args.get("q", "")
+    response = jsonify(field=field, query=prefix, ready=autocomplete.ready(),
+                       suggestions=autocomplete.complete(field, prefix, limit))
+    # Repeated keystrokes for the same prefix are answered by the browser
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return response
+
 
 @bp.route("/add", methods=["GET", "POST"])
 def add():
@@ -91,61 +270,68 @@ def add():
         department = request.form["department"]
         db_source = request.form.get("db_source", "local")  # where to add
 
-        conn = get_connection() if db_source == "local" else get_remote_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO university_books (title, author, year_published, university, department)
-            VALUES (:1, :2, :3, :4, :5)
-            """,
-            (title, author, year, university, department)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with connection(db_source) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO university_books (title, author, year_published, university, department)
+                VALUES (:1, :2, :3, :4, :5)
+                """,
+                (title, author, year, university, department)
+            )
+            conn.commit()
+            cursor.close()
+        result_cache.bump_catalog_version(db_source)
+        book = {"title": title, "author": author, "university": university, "department": department,
+                "year_published": int(year) if year.isdigit() else None}
+        autocomplete.update(new=book)
+        facets.update(db_source.capitalize(), new=book)
+        fulltext.invalidate(db_source.capitalize())
         flash(f"Book added successfully to {db_source} database!", "success")
         return redirect(url_for("books.index"))
 
     return render_template("add.html")
 
 
-from flask import send_file
-from io import BytesIO
+from services.lob_stream import lob_etag, send_lob
 
 @bp.route("/view/<int:book_id>")
 def view(book_id):
     source = request.args.get("source", "local")  # local | remote
-    conn = get_connection() if source == "local" else get_remote_connection()
+    try:
+        conn = get_connection() if source == "local" else get_remote_connection()
+    except (CircuitOpenError, oracledb.Error) as e:
+        flash(f"Cannot open the PDF: {e}", "error")
+        return redirect(url_for("books.index"))
     cursor = conn.cursor()
+    streaming = False
 
     try:
-        cursor.execute(
-            """
-            SELECT pdf_file, title
-            FROM university_books
-            WHERE book_id = :1
-            """,
-            (book_id,)
-        )
-
-        row = cursor.fetchone()
+        row = catalog.get_pdf(cursor, book_id, source)
 
         if not row or not row[0]:
             flash("PDF not found.", "error")
             return redirect(url_for("books.index"))
 
-        pdf_blob = row[0].read()   # IMPORTANT for Oracle BLOB
-        title = row[1]
+        pdf_lob, title, changed_at = row
 
-        return send_file(
-            BytesIO(pdf_blob),
-            mimetype="application/pdf",
-            as_attachment=False,
-            download_name=f"{title}.pdf"
+        # Streamed in chunks; the cursor and connection are closed once it is sent
+        response = send_lob(
+            pdf_lob,
+            download_name=f"{title}.pdf",
+            etag=lob_etag(source, book_id, pdf_lob.size(), changed_at=changed_at),
+            resources=(cursor, conn)
         )
+        streaming = True
+        return response
 
-    finally:
-        cursor.close()
-        conn.close()
-
+    except oracledb.Error as e:
+        if source == "remote":
+            remote_breaker.record(e)
+        flash(f"Cannot open the PDF: {e}", "error")
+        return redirect(url_for("books.index"))
 
+    finally:
+        if not streaming:
+            cursor.close()
+            conn.close()
@@ -1,6 +1,10 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, session, send_file
-from dbconnections.dbconnections import get_connection
-from io import BytesIO
+import oracledb
+from flask import Blueprint, Response, render_template, request, flash, redirect, url_for, session
+from markupsafe import Markup
+from dbconnections.dbconnections import connection, get_connection, get_remote_connection, CircuitOpenError
+from services.pagination import page_size, decode_token, build_page
+from services.lob_stream import lob_etag, send_lob, write_stream
+from services import autocomplete, catalog, catalog_export, facets, fragment_cache, fulltext, result_cache
 
 bp = Blueprint("librarian", __name__, url_prefix="/librarian")
 
@@ -14,29 +18,56 @@ def require_librarian():
     return True
 
 
-# ---------------------------
-# Dashboard
-# ---------------------------
-@bp.route("/")
-def dashboard():
-    if not require_librarian():
-        return redirect(url_for("auth.login"))
+def fetch_book_page(filter_by=None, keyword=None):
+    """
+    Fetch one page of books ordered by title (book_id breaks ties),
+    driven by the ?page= and ?page_size= request args.
+    Returns (books, next_token, prev_token).
+    """
+    size = page_size(request.args)
+    position = decode_token(request.args.get("page"))
+    query, params = catalog.search_query({filter_by: keyword} if filter_by else None, "title", position, size + 1)
 
     conn = get_connection()
     cursor = conn.cursor()
     try:
-        # Show ALL books, not only those uploaded by the librarian
-        cursor.execute("""
-            SELECT book_id, title, author, university, department, year_published
-            FROM university_books
-            ORDER BY title
-        """)
-        books = cursor.fetchall()
+        rows = catalog.fetch_books(cursor, query, params, "Local", rows=size + 1,
+                                   input_sizes=catalog.SEARCH_INPUT_SIZES)
     finally:
         cursor.close()
         conn.close()
 
-    return render_template("librarian/dashboard.html", books=books)
+    return build_page(rows, size, position, lambda book: (book.title, book.book_id, None))
+
+
+def book_grid(load, cacheable=lambda: True):
+    """
+    The rendered book-card grid with its page links. load() returns
+    (books, next_token, prev_token) and only runs when the grid for this
+    query and catalog version isn't cached; the grid is stored unless
+    cacheable() says otherwise once it has run.
+    """
+    grid_key = fragment_cache.key("book_grid", ["local"])
+    grid = fragment_cache.lookup("book_grid", grid_key)
+    if grid is None:
+        books, next_token, prev_token = load()
+        grid = Markup(render_template("librarian/book_grid.html", books=books,
+                                      next_token=next_token, prev_token=prev_token))
+        if cacheable():
+            fragment_cache.store(grid_key, grid)
+    return grid
+
+
+# ---------------------------
+# Dashboard
+# ---------------------------
+@bp.route("/")
+def dashboard():
+    if not require_librarian():
+        return redirect(url_for("auth.login"))
+
+    # Show ALL books, not only those uploaded by the librarian
+    return render_template("librarian/dashboard.html", book_grid=book_grid(fetch_book_page))
 
 
 # ---------------------------
@@ -54,10 +85,10 @@ def add_book():
         department = request.form.get("department", "").strip()
         year = request.form.get("year_published", "").strip()
         pdf_file = request.files.get("pdf_file")
-        pdf_bytes = pdf_file.read() if pdf_file and pdf_file.filename else None
+        has_pdf = bool(pdf_file and pdf_file.filename)
 
         # Validation
-        if not (title and author and university and department and year and pdf_bytes):
+        if not (title and author and university and department and year and has_pdf):
             flash("All fields including PDF are required.", "error")
             return render_template("librarian/insert.html")
 
@@ -70,12 +101,23 @@ def add_book():
         conn = get_connection()
         cursor = conn.cursor()
         try:
+            # Insert an empty BLOB and stream the upload into its locator
+            pdf_out = cursor.var(oracledb.DB_TYPE_BLOB)
             cursor.execute("""
                 INSERT INTO university_books
                 (title, author, university, department, year_published, pdf_file, uploaded_by)
-                VALUES (:1, :2, :3, :4, :5, :6, :7)
-            """, (title, author, university, department, year_int, pdf_bytes, session.get("user_id")))
+                VALUES (:title, :author, :university, :department, :year_published, EMPTY_BLOB(), :uploaded_by)
+                RETURNING pdf_file INTO :pdf_out
+            """, {"title": title, "author": author, "university": university, "department": department,
+                  "year_published": year_int, "uploaded_by": session.get("user_id"), "pdf_out": pdf_out})
+            write_stream(pdf_out.getvalue()[0], pdf_file.stream)
             conn.commit()
+            result_cache.bump_catalog_version("local")
+            book = {"title": title, "author": author, "university": university, "department": department,
+                    "year_published": year_int}
+            autocomplete.update(new=book)
+            facets.update("Local", new=book)
+            fulltext.invalidate("Local")
             flash("Book added successfully!", "success")
             return redirect(url_for("librarian.dashboard"))
         except Exception as e:
@@ -98,28 +140,30 @@ def view_book(book_id):
 
     conn = get_connection()
     cursor = conn.cursor()
+    streaming = False
     try:
-        cursor.execute("""
-            SELECT title, pdf_file 
-            FROM university_books 
-            WHERE book_id=:1
-        """, (book_id,))
-        book = cursor.fetchone()
-        if not book or not book[1]:
+        book = catalog.get_pdf(cursor, book_id)
+        if not book or not book[0]:
             flash("Book PDF not found.", "error")
             return redirect(url_for("librarian.dashboard"))
 
-        # Convert Oracle LOB to bytes
-        pdf_bytes = book[1].read()  # <--- Important!
-
-        return send_file(
-            BytesIO(pdf_bytes),
-            download_name=f"{book[0]}.pdf",
-            mimetype="application/pdf"
+        pdf_lob, title, changed_at = book
+        # Stream the Oracle LOB in chunks instead of reading it into memory
+        response = send_lob(
+            pdf_lob,
+            download_name=f"{title}.pdf",
+            etag=lob_etag("local", book_id, pdf_lob.size(), changed_at=changed_at),
+            resources=(cursor, conn)
         )
+        streaming = True
+        return response
+    except oracledb.Error as e:
+        flash(f"Cannot open the PDF: {e}", "error")
+        return redirect(url_for("librarian.dashboard"))
     finally:
-        cursor.close()
-        conn.close()
+        if not streaming:
+            cursor.close()
+            conn.close()
 
 
 # ---------------------------
@@ -133,8 +177,14 @@ def delete_book(book_id):
     conn = get_connection()
     cursor = conn.cursor()
     try:
+        old = catalog.get_book(cursor, book_id)
         cursor.execute("DELETE FROM university_books WHERE book_id=:1", (book_id,))
         conn.commit()
+        result_cache.bump_catalog_version("local")
+        fulltext.invalidate("Local")
+        if old:
+            autocomplete.update(old=old)
+            facets.update("Local", old=old)
         flash("Book deleted successfully.", "success")
     finally:
         cursor.close()
@@ -153,31 +203,25 @@ def search():
     keyword = request.args.get("keyword", "").strip()
     filter_by = request.args.get("filter", "title")
 
-    if filter_by not in ["title", "author", "university", "department"]:
+    if filter_by not in ["title", "author", "university", "department", "fulltext"]:
         filter_by = "title"
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        query = f"""
-            SELECT book_id, title, author, university, department, year_published
-            FROM university_books
-            WHERE 1=1
-        """
-        params = {}
-
-        if keyword:
-            query += f" AND LOWER({filter_by}) LIKE :keyword"
-            params["keyword"] = f"%{keyword.lower()}%"
-
-        query += " ORDER BY title"
-        cursor.execute(query, params)
-        books = cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+    def load():
+        if filter_by == "fulltext" and keyword:
+            # Ranked search across all metadata fields: shows the best page_size matches
+            conn = get_connection()
+            try:
+                return fulltext.search(conn, "Local", keyword, limit=page_size(request.args)), None, None
+            finally:
+                conn.close()
+        return fetch_book_page(filter_by, keyword)
+
+    def cacheable():
+        # Not while the ranked index is behind the catalog (being rebuilt)
+        return filter_by != "fulltext" or fulltext.current("Local")
 
-    return render_template("librarian/dashboard.html", books=books, keyword=keyword, filter_by=filter_by)
+    return render_template("librarian/dashboard.html", book_grid=book_grid(load, cacheable), keyword=keyword,
+                           filter_by=filter_by)
 
 
 
@@ -189,9 +233,6 @@ def edit_book(book_id):
     if not require_librarian():
         return redirect(url_for("auth.login"))
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
     if request.method == "POST":
         # Get form values
         title = request.form.get("title", "").strip()
@@ -200,7 +241,7 @@ def edit_book(book_id):
         department = request.form.get("department", "").strip()
         year = request.form.get("year_published", "").strip()
         pdf_file = request.files.get("pdf_file")
-        pdf_bytes = pdf_file.read() if pdf_file and pdf_file.filename else None
+        has_pdf = bool(pdf_file and pdf_file.filename)
 
         try:
             year_int = int(year)
@@ -208,53 +249,110 @@ def edit_book(book_id):
             flash("Year must be a number.", "error")
             return redirect(url_for("librarian.edit_book", book_id=book_id))
 
-        try:
-            if pdf_bytes:
-                cursor.execute("""
-                    UPDATE university_books
-                    SET title=:1, author=:2, university=:3, department=:4, year_published=:5, pdf_file=:6
-                    WHERE book_id=:7
-                """, (title, author, university, department, year_int, pdf_bytes, book_id))
-            else:
-                cursor.execute("""
-                    UPDATE university_books
-                    SET title=:1, author=:2, university=:3, department=:4, year_published=:5
-                    WHERE book_id=:6
-                """, (title, author, university, department, year_int, book_id))
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                old = catalog.get_book(cursor, book_id)
+                if has_pdf:
+                    pdf_out = cursor.var(oracledb.DB_TYPE_BLOB)
+                    cursor.execute("""
+                        UPDATE university_books
+                        SET title=:title, author=:author, university=:university, department=:department,
+                            year_published=:year_published, pdf_file=EMPTY_BLOB()
+                        WHERE book_id=:book_id
+                        RETURNING pdf_file INTO :pdf_out
+                    """, {"title": title, "author": author, "university": university, "department": department,
+                          "year_published": year_int, "book_id": book_id, "pdf_out": pdf_out})
+                    for lob in pdf_out.getvalue():
+                        write_stream(lob, pdf_file.stream)
+                else:
+                    cursor.execute("""
+                        UPDATE university_books
+                        SET title=:1, author=:2, university=:3, department=:4, year_published=:5
+                        WHERE book_id=:6
+                    """, (title, author, university, department, year_int, book_id))
+
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                flash("Error updating book: " + str(e), "error")
+                return redirect(url_for("librarian.edit_book", book_id=book_id))
+            finally:
+                cursor.close()
+
+        result_cache.bump_catalog_version("local")
+        fulltext.invalidate("Local")
+        if old:
+            book = {"title": title, "author": author, "university": university, "department": department,
+                    "year_published": year_int}
+            autocomplete.update(old, book)
+            facets.update("Local", old, book)
+        flash("Book updated successfully!", "success")
+        return redirect(url_for("librarian.dashboard"))
 
-            conn.commit()
-            flash("Book updated successfully!", "success")
-            return redirect(url_for("librarian.dashboard"))
-        except Exception as e:
-            conn.rollback()
-            flash("Error updating book: " + str(e), "error")
+    # GET request → fetch existing book data
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            book_data = catalog.get_book(cursor, book_id)
         finally:
             cursor.close()
-            conn.close()
+    if not book_data:
+        flash("Book not found.", "error")
+        return redirect(url_for("librarian.dashboard"))
 
-    # GET request → fetch existing book data
-    try:
-        cursor.execute("""
-            SELECT title, author, university, department, year_published
-            FROM university_books
-            WHERE book_id=:1
-        """, (book_id,))
-        book = cursor.fetchone()
-        if not book:
-            flash("Book not found.", "error")
-            return redirect(url_for("librarian.dashboard"))
+    return render_template("librarian/edit.html", book=book_data)
 
-        book_data = {
-            "title": book[0],
-            "author": book[1],
-            "university": book[2],
-            "department": book[3],
-            "year_published": book[4]
-        }
 
-    finally:
-        cursor.close()
-        conn.close()
+# ---------------------------
+# Export Catalog
+# ---------------------------
+def _close_all(connections):
+    while connections:
+        _, conn = connections.pop()
+        try:
+            conn.close()
+        except Exception:
+            pass
 
-    return render_template("librarian/edit.html", book=book_data)
 
+@bp.route("/export")
+def export():
+    """Download the whole catalog: ?db_source=local|remote|all&format=csv|ndjson&gzip=1"""
+    if not require_librarian():
+        return redirect(url_for("auth.login"))
+
+    db_source = request.args.get("db_source", "local")
+    if db_source not in ("local", "remote", "all"):
+        db_source = "local"
+    fmt = request.args.get("format", "csv")
+    if fmt not in catalog_export.FORMATS:
+        fmt = "csv"
+    compress = request.args.get("gzip") == "1"
+
+    # Connect before the response starts, so an unavailable database is reported here
+    opened = []
+    try:
+        for source in (["local", "remote"] if db_source == "all" else [db_source]):
+            opened.append((source.capitalize(), get_connection() if source == "local" else get_remote_connection()))
+    except (CircuitOpenError, oracledb.Error) as e:
+        _close_all(opened)
+        flash(f"Cannot export the {db_source} catalog: {e}", "error")
+        return redirect(url_for("librarian.dashboard"))
+
+    def generate():
+        try:
+            yield from catalog_export.stream(opened, fmt, compress)
+        except oracledb.Error as e:
+            # Headers are already sent: the download ends short
+            print(f"Catalog export of {db_source} failed: {e}")
+            raise
+        finally:
+            _close_all(opened)
+
+    response = Response(generate(), mimetype="application/gzip" if compress else catalog_export.FORMATS[fmt],
+                        headers={"Content-Disposition":
+                                 f"attachment; filename={catalog_export.filename(db_source, fmt, compress)}"})
+    # Covers clients that disconnect before the body is consumed
+    response.call_on_close(lambda: _close_all(opened))
+    return response
@@ -0,0 +1,61 @@
+import time
+
+from flask import Blueprint, Response, g, request, before_render_template, template_rendered
+
+from services import metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+# ---------------------------
+# Request hooks (every blueprint)
+# ---------------------------
+@bp.before_app_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@bp.after_app_request
+def record_request(response):
+    started = g.pop("request_started", None)
+    if started is None or request.endpoint == "metrics.export":
+        return response
+    seconds = time.perf_counter() - started
+    metrics.REQUEST_SECONDS.observe(seconds, endpoint=request.endpoint or "-",
+                                    method=request.method, status=response.status_code)
+
+    # Per-request breakdown for the browser's network panel
+    stats = metrics.request_stats()
+    response.headers["Server-Timing"] = ", ".join([
+        f"acquire;dur={stats['acquire'] * 1000:.1f}",
+        f"db;dur={stats['db'] * 1000:.1f};desc=\"{stats['round_trips']} round trips, {stats['rows']} rows\"",
+        f"lob;dur={stats['lob'] * 1000:.1f}",
+        f"render;dur={stats['render'] * 1000:.1f}",
+        f"total;dur={seconds * 1000:.1f}",
+    ])
+    return response
+
+
+def _template_started(app, template, context, **extra):
+    g.setdefault("template_starts", []).append(time.perf_counter())
+
+
+def _template_finished(app, template, context, **extra):
+    starts = g.get("template_starts")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    metrics.TEMPLATE_SECONDS.observe(seconds, template=template.name)
+    metrics.request_stats()["render"] += seconds
+
+
+before_render_template.connect(_template_started)
+template_rendered.connect(_template_finished)
+
+
+# ---------------------------
+# Prometheus endpoint
+# ---------------------------
+@bp.route("/metrics")
+def export():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,9 +1,34 @@
 from flask import Blueprint, render_template, session, redirect, send_file, url_for, request, flash
 from dbconnections.dbconnections import get_connection
+from services.cache import ByteLRUCache
+import hashlib
 import io
+import os
+import time
 
 bp = Blueprint("profile", __name__)
 
+AVATAR_CACHE_BYTES = int(os.environ.get("AVATAR_CACHE_BYTES", 32 * 1024 * 1024))
+AVATAR_MAX_AGE = int(os.environ.get("AVATAR_MAX_AGE", 300))  # seconds browsers may reuse an avatar
+
+# user_id -> (expires_at, image bytes, etag); image None means the user has no picture.
+# The cache is per process and invalidate_avatar() only reaches the worker
+# handling the change, so entries expire after AVATAR_MAX_AGE like the browser copy.
+avatar_cache = ByteLRUCache(AVATAR_CACHE_BYTES)
+
+
+def invalidate_avatar(user_id):
+    avatar_cache.delete(user_id)
+
+
+def _cached_avatar(user_id):
+    """(image bytes, etag) from the cache, or None when missing or expired."""
+    entry = avatar_cache.get(user_id)
+    if entry is not None and time.monotonic() >= entry[0]:
+        avatar_cache.delete(user_id)
+        entry = None
+    return None if entry is None else entry[1:]
+
 def _lob_to_bytes(lob):
     if lob is None:
         return None
@@ -26,20 +51,37 @@ def profile():
 
 @bp.route("/profile_image/<int:user_id>")
 def profile_image(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT profile_image FROM users WHERE user_id = :1", (user_id,))
-        result = cursor.fetchone()
-        if not result or not result[0]:
-            # fallback default image
-            return send_file("static/default_profile.png", mimetype="image/png")
-        data = _lob_to_bytes(result[0])
-    finally:
-        cursor.close()
-        conn.close()
+    entry = _cached_avatar(user_id)
+
+    if entry is None:
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT profile_image FROM users WHERE user_id = :1", (user_id,))
+            result = cursor.fetchone()
+            data = _lob_to_bytes(result[0]) if result else None
+        finally:
+            cursor.close()
+            conn.close()
+
+        if not result:
+            # Unknown user: not cached, the ID may be registered later
+            return _default_image()
+
+        entry = (data, hashlib.sha256(data).hexdigest()) if data else (None, None)
+        avatar_cache.set(user_id, (time.monotonic() + AVATAR_MAX_AGE, *entry), size=len(data) if data else 64)
+
+    data, etag = entry
+    if data is None:
+        # fallback default image
+        return _default_image()
+
+    # conditional=True answers If-None-Match with 304
+    return send_file(io.BytesIO(data), mimetype="image/png", etag=etag, max_age=AVATAR_MAX_AGE, conditional=True)
+
 
-    return send_file(io.BytesIO(data), mimetype="image/png")
+def _default_image():
+    return send_file("static/default_profile.png", mimetype="image/png", max_age=AVATAR_MAX_AGE, conditional=True)
 
 @bp.route("/edit_profile", methods=["GET", "POST"])
 def edit_profile():
@@ -63,6 +105,7 @@ def edit_profile():
                 WHERE user_id = :4
             """, (name, email, role, user_id))
             conn.commit()
+            invalidate_avatar(user_id)
             # Update session
             session["name"] = name
             session["email"] = email
@@ -97,6 +140,7 @@ def delete_account():
         # Delete the user
         cursor.execute("DELETE FROM users WHERE user_id = :1", (user_id,))
         conn.commit()
+        invalidate_avatar(user_id)
 
         # Clear session
         session.clear()
@@ -1,11 +1,22 @@
 from flask import Blueprint, render_template, session, redirect, url_for, flash, request, send_file, abort
-from dbconnections.dbconnections import get_connection
+from dbconnections.dbconnections import get_connection, remote_link, CircuitOpenError
+from services import catalog, pdf_store, remote_mirror
+from contextlib import nullcontext
 from datetime import datetime
 import io
+import os
+import oracledb
 
 bp = Blueprint("user_library", __name__, url_prefix="/library")
 REMOTE_DB_LINK = "remote_uni"  # DB link for remote database
 
+# "reference": user_library keeps (source, book_id) + metadata, PDFs live once in pdf_store
+# "copy": legacy mode, every saved row carries its own copy of the PDF BLOB
+LIBRARY_STORAGE = os.environ.get("LIBRARY_STORAGE", "reference")
+
+# Book IDs looked up per round trip over the DB link
+REMOTE_BATCH_SIZE = int(os.environ.get("REMOTE_BATCH_SIZE", 100))
+
 # ---------------------------
 # ADD BOOK TO USER LIBRARY
 # ---------------------------
@@ -22,22 +33,30 @@ def add_to_library(book_id):
     cursor = conn.cursor()
 
     try:
-        # Determine source table
-        table_name = "university_books" if source == "Local" else f"university_books@{REMOTE_DB_LINK}"
+        # Determine source table; reference mode only needs the metadata (the PDF
+        # is fetched lazily by view_pdf), which a fresh local mirror can supply
+        if source == "Local":
+            table_name = "university_books"
+        elif LIBRARY_STORAGE != "copy" and remote_mirror.fresh(conn):
+            table_name = remote_mirror.TABLE
+        else:
+            table_name = f"university_books@{REMOTE_DB_LINK}"
 
-        # Fetch the entire book record
-        cursor.execute(f"""
-            SELECT book_id, title, author, university, department, year_published, pdf_file
-            FROM {table_name}
-            WHERE book_id = :1
-        """, (book_id,))
-        book = cursor.fetchone()
+        pdf_column = "pdf_file" if LIBRARY_STORAGE == "copy" else "NULL"
+        with remote_link(conn) if "@" in table_name else nullcontext():
+            cursor.execute(f"""
+                SELECT book_id, title, author, university, department, year_published, {pdf_column}
+                FROM {table_name}
+                WHERE book_id = :1
+            """, (book_id,))
+            book = cursor.fetchone()
 
         if not book:
             flash(f"Book does not exist in {source} database.", "error")
             return redirect(url_for("books.index"))
 
-        # Insert into user_library
+        # Insert into user_library (pdf_file stays NULL in reference mode)
+        cursor.setinputsizes(pdf_file=oracledb.DB_TYPE_BLOB)
         cursor.execute("""
             MERGE INTO user_library ul
             USING (
@@ -66,6 +85,9 @@ def add_to_library(book_id):
         conn.commit()
         flash(f"Book added to your library from {source} database!", "success")
 
+    except (CircuitOpenError, oracledb.OperationalError) as e:
+        flash(f"Cannot add the book right now: {e}", "error")
+
     finally:
         cursor.close()
         conn.close()
@@ -89,27 +111,11 @@ def my_library():
     cursor = conn.cursor()
 
     # Fetch all books for this user from the local table
-    cursor.execute("""
-        SELECT book_id, title, author, university, department, year_published, source
-        FROM user_library
-        WHERE user_id = :1
-    """, (user_id,))
-    
-    for row in cursor.fetchall():
-        book_data = {
-            "book_id": row[0],
-            "title": row[1],
-            "author": row[2],
-            "university": row[3],
-            "department": row[4],
-            "year_published": row[5],
-            "source": (row[6] or "Local").capitalize()
-        }
-
-        if book_data["source"].lower() == "local":
-            local_books.append(book_data)
+    for book in catalog.fetch_library(cursor, user_id):
+        if book.source == "Local":
+            local_books.append(book)
         else:
-            remote_books.append(book_data)
+            remote_books.append(book)
 
     cursor.close()
     conn.close()
@@ -142,9 +148,9 @@ def remove_from_library(book_id):
 # ---------------------------
 from flask import render_template_string
 
-from flask import render_template_string, send_file, session, redirect, url_for, flash
-import io
+from flask import render_template_string, session, redirect, url_for, flash
 from dbconnections.dbconnections import get_connection
+from services.lob_stream import lob_etag, send_lob
 
 
 @bp.route("/pdf/<int:book_id>")
@@ -156,11 +162,11 @@ def view_pdf(book_id):
 
     conn = get_connection()
     cursor = conn.cursor()
+    streaming = False
 
     try:
-        # Get PDF from the local table only
         cursor.execute("""
-            SELECT pdf_file, source
+            SELECT pdf_sha256, source, pdf_file
             FROM user_library
             WHERE user_id = :1 AND book_id = :2
         """, (user_id, book_id))
@@ -170,27 +176,91 @@ def view_pdf(book_id):
             flash("Book not found in your library.", "error")
             return redirect(url_for("user_library.my_library"))
 
-        pdf_blob, source = row
+        sha, source, pdf_blob = row
+        etag = sha
+        changed_at = None
+
+        if not sha and not pdf_blob:
+            if (source or "Local").lower() == "local":
+                # Local books are referenced in place, never copied
+                found = catalog.get_pdf(cursor, book_id)
+                if found:
+                    pdf_blob, _, changed_at = found
+            else:
+                # First view of a remote book: pull it over the DB link once,
+                # then every library entry for it shares the stored copy
+                with remote_link(conn):
+                    sha = pdf_store.store_from(cursor, f"university_books@{REMOTE_DB_LINK}",
+                                               "book_id = :book_id", {"book_id": book_id})
+                if sha:
+                    cursor.execute("""
+                        UPDATE user_library SET pdf_sha256 = :1
+                        WHERE book_id = :2 AND UPPER(source) = 'REMOTE' AND pdf_sha256 IS NULL
+                    """, (sha, book_id))
+                    conn.commit()
+                    etag = sha
+
+        if sha:
+            pdf_blob = pdf_store.fetch(cursor, sha)
+
         if not pdf_blob:
             flash("No PDF available for this book.", "info")
             return redirect(url_for("user_library.my_library"))
 
-        # Read the BLOB
-        pdf_bytes = pdf_blob.read() if hasattr(pdf_blob, 'read') else pdf_blob
-        return send_file(
-            io.BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            download_name=f"book_{book_id}.pdf"
+        # Stream the BLOB in chunks; cursor and connection are closed once it is sent
+        response = send_lob(
+            pdf_blob,
+            download_name=f"book_{book_id}.pdf",
+            etag=etag or lob_etag("library", user_id, book_id,
+                                  pdf_blob.size() if hasattr(pdf_blob, "size") else len(pdf_blob),
+                                  changed_at=changed_at),
+            resources=(cursor, conn)
         )
+        streaming = True
+        return response
 
     except Exception as e:
         flash(f"Cannot fetch PDF: {e}", "error")
         return redirect(url_for("user_library.my_library"))
     finally:
-        cursor.close()
-        conn.close()
+        if not streaming:
+            cursor.close()
+            conn.close()
+
+
+
+
+def remote_books_query():
+    """SELECT for one batch of remote book IDs; binds :1..:REMOTE_BATCH_SIZE."""
+    placeholders = ", ".join(f":{i + 1}" for i in range(REMOTE_BATCH_SIZE))
+    return f"""
+        SELECT {catalog.BOOK_COLUMNS}
+        FROM university_books@{REMOTE_DB_LINK}
+        WHERE book_id IN ({placeholders})
+    """
 
 
+def remote_batches(book_ids):
+    """Split book_ids into REMOTE_BATCH_SIZE lists, padding the last one with NULLs."""
+    for start in range(0, len(book_ids), REMOTE_BATCH_SIZE):
+        batch = list(book_ids[start:start + REMOTE_BATCH_SIZE])
+        yield batch + [None] * (REMOTE_BATCH_SIZE - len(batch))
+
+
+def fetch_remote_books(cursor, book_ids):
+    """
+    Fetch remote catalog rows for book_ids over the DB link and return
+    {book_id: Book}. Runs one round trip per REMOTE_BATCH_SIZE ids; every batch
+    binds exactly REMOTE_BATCH_SIZE numbers (unused slots are NULL) so the
+    statement text and bind types never change and it stays cached.
+    """
+    sql = remote_books_query()
+    found = {}
+    for batch in remote_batches(book_ids):
+        cursor.setinputsizes(*([oracledb.DB_TYPE_NUMBER] * REMOTE_BATCH_SIZE))
+        for book in catalog.fetch_books(cursor, sql, batch, "Remote", rows=REMOTE_BATCH_SIZE):
+            found[book.book_id] = book
+    return found
 
 
 @bp.route("/remote-library")
@@ -200,45 +270,32 @@ def remote_library():
         return redirect(url_for("auth.login"))
 
     user_id = session["user_id"]
-    remote_books = []
+    book_ids, found, failed = [], {}, False
 
-    # Fetch only remote entries from user_library
-    conn_local = get_connection()
-    cursor_local = conn_local.cursor()
-    cursor_local.execute(
-        "SELECT book_id, source FROM user_library WHERE user_id = :1 AND UPPER(source) = 'REMOTE'",
-        (user_id,)
-    )
-    entries = cursor_local.fetchall()
-    cursor_local.close()
-    conn_local.close()
-
-    for book_id, source in entries:
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            # Query the remote database via DB link
-            cursor.execute(f"""
-                SELECT book_id, title, author, university, department, year_published
-                FROM university_books@{REMOTE_DB_LINK}
-                WHERE book_id = :1
-            """, (book_id,))
-            row = cursor.fetchone()
-            cursor.close()
-            conn.close()
+    # One connection: the saved entries, then the remote rows in batches
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT book_id FROM user_library WHERE user_id = :1 AND UPPER(source) = 'REMOTE' ORDER BY added_at",
+            (user_id,)
+        )
+        book_ids = [row[0] for row in cursor]
+        if book_ids:
+            with remote_link(conn):
+                found = fetch_remote_books(cursor, book_ids)
+    except Exception as e:
+        failed = True
+        flash(f"Cannot fetch remote books: {e}", "error")
+    finally:
+        cursor.close()
+        conn.close()
+
+    remote_books = [found[book_id] for book_id in book_ids if book_id in found]
 
-            if row:
-                remote_books.append({
-                    "book_id": row[0],
-                    "title": row[1],
-                    "author": row[2],
-                    "university": row[3],
-                    "department": row[4],
-                    "year_published": row[5],
-                    "source": "Remote"
-                })
-        except Exception as e:
-            flash(f"Cannot fetch remote book {book_id}: {e}", "error")
-
-    return render_template("remote_saved.html", books=remote_books)
+    missing = [str(book_id) for book_id in book_ids if book_id not in found]
+    if missing and not failed:
+        flash(f"{len(missing)} saved remote book(s) no longer exist in the remote database "
+              f"(IDs: {', '.join(missing)}).", "warning")
 
+    return render_template("saved.html", local_books=[], remote_books=remote_books)
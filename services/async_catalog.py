@@ -0,0 +1,146 @@
+"""
+Async versions of the catalog queries in routes/books.py and
+routes/user_library.py. They build the same SQL through the same helpers,
+so results match the threaded path row for row.
+"""
+import asyncio
+
+import oracledb
+
+from dbconnections.async_db import async_connection
+from dbconnections.dbconnections import remote_link
+from routes import books, user_library
+from services import catalog, content_index, remote_mirror
+
+
+async def query_books_async(conn, source_name, search_type=None, keyword=None, sort=None, position=None, limit=None,
+                            chosen=None, table="university_books"):
+    query, params = books.book_query(source_name, search_type, keyword, sort, position, limit, chosen, table)
+    with conn.cursor() as cursor:
+        catalog.tune(cursor, limit)
+        cursor.setinputsizes(**catalog.SEARCH_INPUT_SIZES)
+        await cursor.execute(query, params)
+        cursor.rowfactory = catalog.book_factory(source_name)
+        return await cursor.fetchall()
+
+
+async def content_search_async(conn, source_name, keyword, limit=50):
+    """Async content_index.search: ranked matches from the manuscript text index."""
+    params = content_index.search_params(keyword, limit)
+    if params is None:
+        return []
+    with conn.cursor() as cursor:
+        catalog.tune(cursor, limit)
+        cursor.setinputsizes(**content_index.SEARCH_INPUT_SIZES)
+        await cursor.execute(content_index.SEARCH_SQL, params)
+        cursor.rowfactory = catalog.book_factory(source_name)
+        return await cursor.fetchall()
+
+
+async def query_mirror_async(search_type, keyword, sort, position, limit, chosen=None):
+    """Async books.query_mirror: a remote search answered from the local mirror, or None."""
+    if search_type in books.RANKED_SEARCHES:
+        return None
+    try:
+        async with async_connection("local") as conn:
+            if not await remote_mirror.fresh_async(conn):
+                return None
+            conn.call_timeout = int(books.SOURCE_TIMEOUT * 1000)
+            return await query_books_async(conn, "Remote", search_type, keyword, sort, position, limit, chosen,
+                                           table=remote_mirror.TABLE)
+    except oracledb.DatabaseError as e:
+        print(f"Remote mirror unavailable, querying live: {e}")
+        remote_mirror.stale()
+        return None
+
+
+async def _query_source_async(source, search_type, keyword, sort, position, limit, chosen=None):
+    if search_type == "fulltext":
+        # The full-text fallback index is synchronous; keep it off the event loop
+        return await asyncio.to_thread(books.query_source, source, search_type, keyword, sort, position, limit)
+
+    if source == "remote":
+        found = await query_mirror_async(search_type, keyword, sort, position, limit, chosen)
+        if found is not None:
+            return found
+
+    async with async_connection(source) as conn:
+        conn.call_timeout = int(books.SOURCE_TIMEOUT * 1000)
+        if search_type == "content":
+            return await content_search_async(conn, source.capitalize(), keyword, limit)
+        return await query_books_async(conn, source.capitalize(), search_type, keyword, sort, position, limit,
+                                       chosen)
+
+
+async def federated_query_async(sources, search_type=None, keyword=None, sort=None, position=None, limit=None,
+                                chosen=None):
+    """
+    Same contract as books.federated_query: returns (books, errors), with the
+    sources queried concurrently through asyncio.gather.
+    """
+    sort = sort if sort in books.ALLOWED_SORT else "book_id"
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(_query_source_async(source, search_type, keyword, sort, position, limit, chosen),
+                           books.SOURCE_TIMEOUT)
+          for source in sources),
+        return_exceptions=True
+    )
+
+    results, errors = [], {}
+    for source, outcome in zip(sources, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            errors[source] = f"timed out after {books.SOURCE_TIMEOUT:g}s"
+        elif isinstance(outcome, Exception):
+            errors[source] = str(outcome)
+        else:
+            results.append(outcome)
+
+    return books.merge_results(results, search_type, sort, position), errors
+
+
+async def my_library_async(user_id):
+    """Returns (local_books, remote_books) for a user, as my_library renders them."""
+    async with async_connection("local") as conn:
+        with conn.cursor() as cursor:
+            catalog.tune(cursor)
+            await cursor.execute(catalog.LIBRARY_SQL, (user_id,))
+            cursor.rowfactory = catalog.library_book
+            entries = await cursor.fetchall()
+
+    local_books = [b for b in entries if b.source == "Local"]
+    remote_books = [b for b in entries if b.source != "Local"]
+    return local_books, remote_books
+
+
+async def _fetch_remote_batch(sql, batch):
+    async with async_connection("local") as conn:
+        # Reads university_books@remote_uni: the remote breaker and call timeout apply
+        with remote_link(conn), conn.cursor() as cursor:
+            catalog.tune(cursor, user_library.REMOTE_BATCH_SIZE)
+            cursor.setinputsizes(*([oracledb.DB_TYPE_NUMBER] * user_library.REMOTE_BATCH_SIZE))
+            await cursor.execute(sql, batch)
+            cursor.rowfactory = catalog.book_factory("Remote")
+            return await cursor.fetchall()
+
+
+async def fetch_remote_books_async(book_ids):
+    """Like user_library.fetch_remote_books, with every batch in flight at once on its own connection."""
+    sql = user_library.remote_books_query()
+    batches = await asyncio.gather(*(_fetch_remote_batch(sql, batch)
+                                     for batch in user_library.remote_batches(book_ids)))
+    return {book.book_id: book for rows in batches for book in rows}
+
+
+async def remote_library_async(user_id):
+    """Returns (remote_books, missing_book_ids) for a user's saved remote books."""
+    async with async_connection("local") as conn:
+        with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT book_id FROM user_library WHERE user_id = :1 AND UPPER(source) = 'REMOTE' ORDER BY added_at",
+                (user_id,)
+            )
+            book_ids = [row[0] for row in await cursor.fetchall()]
+
+    found = await fetch_remote_books_async(book_ids)
+    remote_books = [found[b] for b in book_ids if b in found]
+    return remote_books, [b for b in book_ids if b not in found]
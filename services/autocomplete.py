@@ -0,0 +1,161 @@
+"""
+Typeahead suggestions for title, author, university and department.
+
+Each field is one sorted list of its values (both databases, duplicates
+kept once per book) ordered case-insensitively, so a prefix lookup is two
+binary searches plus one per suggestion returned: no database round trip.
+
+The index is built by a background thread at startup (start()) and rebuilt
+every AUTOCOMPLETE_REFRESH seconds to pick up changes made elsewhere
+(bulk imports, the remote site). Librarian writes are applied to it
+immediately through update().
+"""
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from dbconnections.dbconnections import connection
+from services import catalog
+
+FIELDS = ("title", "author", "university", "department")
+REFRESH_INTERVAL = int(os.environ.get("AUTOCOMPLETE_REFRESH", 3600))  # seconds, 0 = build once
+SOURCES = ("local", "remote")
+
+
+class PrefixIndex:
+    """Sorted value arrays per field; rows are (title, author, university, department)."""
+
+    def __init__(self, rows=()):
+        self.values = {field: [] for field in FIELDS}
+        # Equal values share one string object while building
+        shared = {}
+        for row in rows:
+            for field, value in zip(FIELDS, row):
+                if value:
+                    self.values[field].append(shared.setdefault(value, value))
+        for values in self.values.values():
+            values.sort(key=str.lower)
+
+    def add(self, row):
+        for field, value in zip(FIELDS, row):
+            if value:
+                insort(self.values[field], value, key=str.lower)
+
+    def remove(self, row):
+        for field, value in zip(FIELDS, row):
+            if not value:
+                continue
+            values = self.values[field]
+            lowered = value.lower()
+            i = bisect_left(values, lowered, key=str.lower)
+            while i < len(values) and values[i].lower() == lowered:
+                if values[i] == value:
+                    del values[i]
+                    break
+                i += 1
+
+    def complete(self, field, prefix, limit=10):
+        """Up to `limit` distinct values of `field` starting with `prefix`, ignoring case."""
+        prefix = prefix.strip().lower()
+        values = self.values[field]
+        if not prefix:
+            return []
+        suggestions = []
+        i = bisect_left(values, prefix, key=str.lower)
+        while i < len(values) and len(suggestions) < limit:
+            lowered = values[i].lower()
+            if not lowered.startswith(prefix):
+                break
+            suggestions.append(values[i])
+            # Skip the other books with the same value
+            i = bisect_right(values, lowered, lo=i, key=str.lower)
+        return suggestions
+
+    def __len__(self):
+        return len(self.values["title"])
+
+
+_index = PrefixIndex()
+_ready = False
+_pending = None      # changes made while a rebuild is running, replayed onto the new index
+_lock = threading.Lock()
+
+
+def _row(book):
+    return tuple(book[field] for field in FIELDS)
+
+
+def load(source):
+    """Read one database's field values."""
+    with connection(source) as conn:
+        cursor = conn.cursor()
+        try:
+            catalog.tune(cursor)
+            cursor.execute(f"SELECT {', '.join(FIELDS)} FROM university_books")
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def refresh():
+    """Rebuild the index from every reachable database and swap it in."""
+    global _index, _ready, _pending
+    with _lock:
+        _pending = []
+    rows = []
+    for source in SOURCES:
+        try:
+            rows.extend(load(source))
+        except Exception as e:
+            print(f"Autocomplete: could not read the {source} catalog: {e}")
+    index = PrefixIndex(rows)
+    with _lock:
+        for old, new in _pending:
+            _apply(index, old, new)
+        _index, _ready, _pending = index, True, None
+
+
+def _refresh_loop():
+    while True:
+        started = time.monotonic()
+        refresh()
+        print(f"Autocomplete index: {len(_index)} books in {time.monotonic() - started:.1f}s")
+        if not REFRESH_INTERVAL:
+            return
+        time.sleep(REFRESH_INTERVAL)
+
+
+def start():
+    """Build the index in the background; suggestions are empty until it is ready."""
+    threading.Thread(target=_refresh_loop, name="autocomplete-index", daemon=True).start()
+
+
+def _apply(index, old, new):
+    if old is not None:
+        index.remove(old)
+    if new is not None:
+        index.add(new)
+
+
+def update(old=None, new=None):
+    """
+    Apply a committed catalog write: old is the book before the change
+    (None for an insert), new the book after it (None for a delete).
+    Both are Book records or dicts with the FIELDS keys.
+    """
+    old = _row(old) if old is not None else None
+    new = _row(new) if new is not None else None
+    with _lock:
+        _apply(_index, old, new)
+        if _pending is not None:
+            _pending.append((old, new))
+
+
+def complete(field, prefix, limit=10):
+    with _lock:
+        return _index.complete(field, prefix, limit)
+
+
+def ready():
+    return _ready
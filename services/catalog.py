@@ -0,0 +1,244 @@
+"""
+Catalog repository: the shared column lists, row records and fetch tuning.
+
+Rows are mapped straight into Book records by the cursor's rowfactory, so a
+listing holds one small __slots__ object per row instead of a tuple plus a
+7-key dict. Book supports book["title"] as well as book.title, so merge
+keys, templates and JSON encoding work unchanged.
+
+Fetch sizes follow the query shape: a page or lookup of n rows is fetched
+with arraysize n and prefetchrows n + 1 (one round trip, end of data seen),
+full scans with SCAN_ARRAYSIZE rows per round trip.
+
+Catalog searches go through search_query(). Every filter is always present
+with a NULL-tolerant bind and the sort column comes from a whitelist, so the
+SQL text depends only on the sort column, the page position's shape and
+which facets are selected: a fixed set (search_statements()) that stays in
+the statement cache. Selected facets are plain equality predicates so they
+can use their indexes (migration 6). The same statements run against the
+local mirror of the remote catalog (remote_books_mirror, migration 7).
+"""
+import os
+import time
+from functools import lru_cache
+
+import oracledb
+
+from services.pagination import keyset_condition, order_by
+
+BOOK_COLUMNS = "book_id, title, author, university, department, year_published"
+
+COLUMN_MISSING = 904   # ORA-00904: invalid identifier
+PDF_CHANGE_RECHECK = 300  # seconds before a database without pdf_changed_at is tried again
+
+SCAN_ARRAYSIZE = int(os.environ.get("SCAN_ARRAYSIZE", 1000))
+
+LIBRARY_SQL = f"""
+    SELECT {BOOK_COLUMNS}, source
+    FROM user_library
+    WHERE user_id = :1
+"""
+
+
+# Filter name -> the expression its LIKE pattern is matched against
+SEARCH_FILTERS = {
+    "title": "LOWER(title)",
+    "author": "LOWER(author)",
+    "university": "LOWER(university)",
+    "department": "LOWER(department)",
+    "year_published": "TO_CHAR(year_published)",
+}
+
+SORT_COLUMNS = ["book_id", "title", "author", "university", "department", "year_published"]
+
+# Tables a search can read: the catalog itself or the mirror of the remote one
+SEARCH_TABLES = ("university_books", "remote_books_mirror")
+
+# Columns a search can be narrowed to one value of (facets.py)
+FACET_COLUMNS = ("university", "department", "year_published")
+
+SEARCH_INPUT_SIZES = {name: oracledb.DB_TYPE_VARCHAR for name in SEARCH_FILTERS}
+
+
+class Book:
+    """One catalog row, from either database or a user's library."""
+
+    __slots__ = ("book_id", "title", "author", "university", "department", "year_published", "source", "score")
+
+    def __init__(self, book_id, title, author, university, department, year_published, source=None, score=None):
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        self.university = university
+        self.department = department
+        self.year_published = year_published
+        self.source = source
+        self.score = score
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.score is None:
+            del data["score"]
+        return data
+
+    def __repr__(self):
+        return f"Book({self.book_id!r}, {self.title!r}, source={self.source!r})"
+
+
+def json_default(value):
+    """json.dumps default= hook that encodes Book records as dicts."""
+    if isinstance(value, Book):
+        return value.to_dict()
+    return str(value)
+
+
+# ---------------------------
+# Row factories
+# ---------------------------
+def book_factory(source):
+    """rowfactory for BOOK_COLUMNS (plus an optional score column) from one database."""
+    def make(book_id, title, author, university, department, year_published, score=None):
+        return Book(book_id, title, author, university, department, year_published, source, score)
+    return make
+
+
+def library_book(book_id, title, author, university, department, year_published, source):
+    """rowfactory for LIBRARY_SQL."""
+    return Book(book_id, title, author, university, department, year_published, (source or "Local").capitalize())
+
+
+# ---------------------------
+# Canonical search statement
+# ---------------------------
+def _position_shape(position, sort):
+    """What the keyset part of the SQL text depends on: direction and a NULL sort value."""
+    if not position:
+        return None
+    return bool(position.get("back")), sort != "book_id" and position.get("v") is None
+
+
+@lru_cache(maxsize=None)
+def _search_sql(sort, shape, limited, facets=(), table="university_books"):
+    filters = "\n              AND ".join([f"(:{name} IS NULL OR {expr} LIKE :{name})"
+                                           for name, expr in SEARCH_FILTERS.items()] +
+                                          [f"{column} = :eq_{column}" for column in facets])
+    sql = f"""
+        SELECT {BOOK_COLUMNS}
+        FROM {table}
+        WHERE {filters}"""
+    backwards = False
+    if shape:
+        backwards, null_value = shape
+        position = {"id": 0, "v": None if null_value else "", "back": backwards}
+        condition, _ = keyset_condition(sort, "book_id", position)
+        sql += f"\n          AND {condition}"
+    sql += "\n       " + order_by(sort, "book_id", backwards)
+    if limited:
+        sql += "\n        FETCH FIRST :page_limit ROWS ONLY"
+    return sql
+
+
+def search_query(filters=None, sort=None, position=None, limit=None, inclusive=False, facets=None,
+                 table="university_books"):
+    """
+    Build a catalog search. filters maps SEARCH_FILTERS names to keywords
+    (substring, case-insensitive); facets maps FACET_COLUMNS to an exact
+    value; sort is one of SORT_COLUMNS; position is a decoded page token;
+    table is one of SEARCH_TABLES.
+    Returns (query, params); execute it with SEARCH_INPUT_SIZES so the NULL
+    filter binds keep their type.
+    """
+    sort = sort if sort in SORT_COLUMNS else "book_id"
+    if table not in SEARCH_TABLES:
+        raise ValueError(f"not a catalog table: {table}")
+    params = {name: None for name in SEARCH_FILTERS}
+    for name, keyword in (filters or {}).items():
+        if name in SEARCH_FILTERS and keyword:
+            params[name] = f"%{keyword.lower()}%"
+    active = tuple(column for column in FACET_COLUMNS if (facets or {}).get(column) is not None)
+    for column in active:
+        params[f"eq_{column}"] = facets[column]
+    if position:
+        _, binds = keyset_condition(sort, "book_id", position, inclusive=inclusive)
+        params.update(binds)
+    if limit:
+        params["page_limit"] = limit
+    return _search_sql(sort, _position_shape(position, sort), bool(limit), active, table), params
+
+
+def search_statements(table="university_books"):
+    """Every SQL text search_query() can produce for one table."""
+    positions = [None] + [{"id": 0, "v": value, "back": back} for back in (False, True) for value in ("", None)]
+    facet_sets = [tuple(c for i, c in enumerate(FACET_COLUMNS) if mask >> i & 1)
+                  for mask in range(2 ** len(FACET_COLUMNS))]
+    texts = {_search_sql(sort, _position_shape(position, sort), limited, facets, table)
+             for sort in SORT_COLUMNS for position in positions for limited in (False, True)
+             for facets in facet_sets}
+    return sorted(texts)
+
+
+# ---------------------------
+# Fetch helpers
+# ---------------------------
+def tune(cursor, rows=None):
+    """Size the fetch for `rows` expected rows, or for a full scan when rows is None."""
+    if rows is None:
+        cursor.arraysize = SCAN_ARRAYSIZE
+        cursor.prefetchrows = SCAN_ARRAYSIZE
+    else:
+        cursor.arraysize = max(rows, 1)
+        cursor.prefetchrows = rows + 1
+
+
+def fetch_books(cursor, query, params, source, rows=None, input_sizes=None):
+    """Run a BOOK_COLUMNS query and return its rows as Book records."""
+    tune(cursor, rows)
+    if input_sizes:
+        cursor.setinputsizes(**input_sizes)
+    cursor.execute(query, params)
+    cursor.rowfactory = book_factory(source)
+    return cursor.fetchall()
+
+
+def get_book(cursor, book_id, source="Local"):
+    tune(cursor, 1)
+    cursor.execute(f"SELECT {BOOK_COLUMNS} FROM university_books WHERE book_id = :1", (book_id,))
+    cursor.rowfactory = book_factory(source)
+    return cursor.fetchone()
+
+
+_no_pdf_changed_at = {}  # source -> monotonic time pdf_changed_at was found missing
+
+
+def get_pdf(cursor, book_id, source="local"):
+    """
+    (pdf_file, title, pdf_changed_at) of a book, or None. pdf_changed_at is
+    set whenever the PDF is replaced (migration 8); on a database without
+    it the value is None.
+    """
+    missing_at = _no_pdf_changed_at.get(source)
+    changed = "NULL" if missing_at and time.monotonic() - missing_at < PDF_CHANGE_RECHECK else "pdf_changed_at"
+    sql = "SELECT pdf_file, title, {changed} FROM university_books WHERE book_id = :1"
+    tune(cursor, 1)
+    try:
+        cursor.execute(sql.format(changed=changed), (book_id,))
+    except oracledb.DatabaseError as e:
+        if changed == "NULL" or getattr(e.args[0], "code", None) != COLUMN_MISSING:
+            raise
+        _no_pdf_changed_at[source] = time.monotonic()
+        cursor.execute(sql.format(changed="NULL"), (book_id,))
+    else:
+        if changed != "NULL":
+            _no_pdf_changed_at.pop(source, None)
+    return cursor.fetchone()
+
+
+def fetch_library(cursor, user_id):
+    """A user's saved books (both sources), as Book records."""
+    tune(cursor)
+    cursor.execute(LIBRARY_SQL, (user_id,))
+    cursor.rowfactory = library_book
+    return cursor.fetchall()
@@ -0,0 +1,117 @@
+"""
+Circuit breaker for calls to a database that may be unreachable.
+
+closed     calls go through; `failure_threshold` consecutive failures open it
+open       calls fail at once with CircuitOpenError for `reset_timeout` seconds
+half_open  one probe call is let through: success closes the circuit,
+           failure opens it again. If the probe never reports back, another
+           one is allowed after `reset_timeout`.
+
+Transitions are printed and exported as metrics (circuit_breaker_state,
+circuit_breaker_transitions_total, circuit_breaker_rejected_total).
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from services import metrics
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+TRANSITIONS = metrics.Counter("circuit_breaker_transitions_total", "Circuit breaker state changes.",
+                              ("name", "state"))
+REJECTED = metrics.Counter("circuit_breaker_rejected_total", "Calls failed fast by an open circuit.", ("name",))
+
+BREAKERS = []
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0, is_failure=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure or (lambda error: True)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+        self._lock = threading.Lock()
+        BREAKERS.append(self)
+
+    def _set_state(self, state, reason=""):
+        # Called with the lock held
+        if state == self.state:
+            return
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}{f' ({reason})' if reason else ''}")
+        self.state = state
+        TRANSITIONS.inc(name=self.name, state=state)
+
+    def retry_in(self):
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN, "probing")
+                self.probe_started = None
+            if self.state == HALF_OPEN and (self.probe_started is None
+                                            or now - self.probe_started >= self.reset_timeout):
+                self.probe_started = now
+                return
+        REJECTED.inc(name=self.name)
+        raise CircuitOpenError(f"{self.name} database unavailable, retrying in {self.retry_in():.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.probe_started = None
+            self._set_state(CLOSED, "call succeeded")
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.probe_started = None
+                self._set_state(OPEN, f"{self.failures} failure(s), last: {error}")
+
+    def record(self, error):
+        """Record the outcome of a call that raised `error` (errors that aren't failures count as success)."""
+        if self.is_failure(error):
+            self.record_failure(error)
+        else:
+            self.record_success()
+
+    @contextmanager
+    def guard(self):
+        """
+        Wrap a call:
+
+            with breaker.guard():
+                ...
+        """
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record(e)
+            raise
+        self.record_success()
+
+
+def _states():
+    for breaker in list(BREAKERS):
+        for state in (CLOSED, OPEN, HALF_OPEN):
+            yield {"name": breaker.name, "state": state}, int(breaker.state == state)
+
+
+metrics.GaugeFunc("circuit_breaker_state", "1 for the current state of each circuit breaker.", _states)
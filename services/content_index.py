@@ -0,0 +1,263 @@
+"""
+Search inside manuscripts: a token index over the text of every PDF.
+
+Indexing (index_pending(), run by commands/index_manuscripts.py) picks the
+books whose PDF is new or changed since it was last indexed (migration 8),
+streams each BLOB to a spool file and extracts its text in a
+ProcessPoolExecutor with pypdf, a pure-Python parser, so parsing uses every
+core and never blocks the process that talks to the database. The text
+goes to book_text and its token counts to book_text_terms; each batch is
+committed on its own, so an interrupted run resumes with the books still
+pending.
+
+search() only reads book_text_terms: a book matches when it contains every
+word of the query, ranked by how often they occur. Like catalog searches it
+is one canonical statement (MAX_TERMS token binds, unused ones NULL).
+"""
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import oracledb
+
+from services import catalog
+from services.fulltext import tokenize
+from services.lob_stream import read_chunks
+
+INDEX_WORKERS = int(os.environ.get("CONTENT_INDEX_WORKERS", os.cpu_count() or 2))
+BATCH_SIZE = int(os.environ.get("CONTENT_INDEX_BATCH", 20))  # PDFs spooled and committed together
+SPOOL_DIR = os.environ.get("CONTENT_SPOOL_DIR") or None        # default: the system temp directory
+MAX_TEXT_CHARS = int(os.environ.get("CONTENT_MAX_CHARS", 2_000_000))  # text kept per manuscript
+
+MAX_TERMS = 8          # query words used; more are ignored
+MAX_TOKEN_LENGTH = 64  # book_text_terms.token
+
+PENDING_SQL = """
+    SELECT b.book_id, b.pdf_changed_at
+    FROM university_books b
+    LEFT JOIN book_text t ON t.book_id = b.book_id
+    WHERE b.pdf_file IS NOT NULL
+      AND (t.book_id IS NULL OR t.pdf_changed_at < b.pdf_changed_at)
+    ORDER BY b.book_id
+    FETCH FIRST :batch_size ROWS ONLY
+"""
+
+_TERM_BINDS = [f"t{i}" for i in range(MAX_TERMS)]
+
+SEARCH_SQL = f"""
+    SELECT {', '.join(f'b.{column.strip()}' for column in catalog.BOOK_COLUMNS.split(','))}, SUM(t.frequency)
+    FROM book_text_terms t
+    JOIN university_books b ON b.book_id = t.book_id
+    WHERE t.token IN ({', '.join(f':{name}' for name in _TERM_BINDS)})
+    GROUP BY b.book_id, b.title, b.author, b.university, b.department, b.year_published
+    HAVING COUNT(*) = :term_count
+    ORDER BY SUM(t.frequency) DESC, b.book_id
+    FETCH FIRST :page_limit ROWS ONLY
+"""
+
+SEARCH_INPUT_SIZES = {name: oracledb.DB_TYPE_VARCHAR for name in _TERM_BINDS}
+
+
+# ---------------------------
+# Search
+# ---------------------------
+def query_terms(keyword):
+    """The distinct words of a query, as stored in book_text_terms."""
+    terms = [token for token in dict.fromkeys(tokenize(keyword)) if len(token) <= MAX_TOKEN_LENGTH]
+    return terms[:MAX_TERMS]
+
+
+def search_params(keyword, limit=50):
+    """Binds for SEARCH_SQL, or None when keyword has no searchable words."""
+    terms = query_terms(keyword)
+    if not terms:
+        return None
+    params = {name: terms[i] if i < len(terms) else None for i, name in enumerate(_TERM_BINDS)}
+    params.update(term_count=len(terms), page_limit=limit)
+    return params
+
+
+def search(conn, source_name, keyword, limit=50):
+    """Books whose text contains every word of keyword, best first, as catalog.Book records with a score."""
+    params = search_params(keyword, limit)
+    if params is None:
+        return []
+    cursor = conn.cursor()
+    try:
+        return catalog.fetch_books(cursor, SEARCH_SQL, params, source_name, rows=limit,
+                                   input_sizes=SEARCH_INPUT_SIZES)
+    finally:
+        cursor.close()
+
+
+# ---------------------------
+# Extraction (worker processes)
+# ---------------------------
+def extract_text(path):
+    """Text of the PDF at path, up to MAX_TEXT_CHARS characters."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF text extraction needs the 'pypdf' package (pip install pypdf)")
+
+    parts, size = [], 0
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        size += len(text)
+        if size >= MAX_TEXT_CHARS:
+            break
+    return "\n".join(parts)[:MAX_TEXT_CHARS]
+
+
+def terms(text):
+    """token -> occurrences, for book_text_terms."""
+    return Counter(token for token in tokenize(text) if len(token) <= MAX_TOKEN_LENGTH)
+
+
+# ---------------------------
+# Indexing
+# ---------------------------
+def _spool(cursor, book_id):
+    """Stream one book's PDF into a spool file; returns its path, or None for an empty BLOB."""
+    cursor.execute("SELECT pdf_file FROM university_books WHERE book_id = :1", (book_id,))
+    row = cursor.fetchone()
+    if not row or not row[0] or not row[0].size():
+        return None
+    with tempfile.NamedTemporaryFile(prefix=f"book-{book_id}-", suffix=".pdf", dir=SPOOL_DIR,
+                                     delete=False) as spool:
+        for data in read_chunks(row[0]):
+            spool.write(data)
+    return spool.name
+
+
+def _store(cursor, book_id, changed_at, text=None, error=None):
+    counts = terms(text) if text else {}
+    cursor.execute("DELETE FROM book_text_terms WHERE book_id = :1", (book_id,))
+    cursor.execute("DELETE FROM book_text WHERE book_id = :1", (book_id,))
+    cursor.setinputsizes(content=oracledb.DB_TYPE_CLOB)
+    cursor.execute("""
+        INSERT INTO book_text (book_id, pdf_changed_at, content, term_count, error, indexed_at)
+        VALUES (:book_id, :changed_at, :content, :term_count, :error, SYSTIMESTAMP)
+    """, {"book_id": book_id, "changed_at": changed_at, "content": text, "term_count": len(counts),
+          "error": error[:400] if error else None})
+    if counts:
+        cursor.executemany("INSERT INTO book_text_terms (token, book_id, frequency) VALUES (:1, :2, :3)",
+                           [(token, book_id, count) for token, count in counts.items()])
+
+
+def remove_deleted(conn):
+    """Drop the text of books that no longer exist. Returns the number removed."""
+    cursor = conn.cursor()
+    try:
+        orphans = "NOT EXISTS (SELECT 1 FROM university_books b WHERE b.book_id = {table}.book_id)"
+        cursor.execute(f"DELETE FROM book_text_terms WHERE {orphans.format(table='book_text_terms')}")
+        cursor.execute(f"DELETE FROM book_text WHERE {orphans.format(table='book_text')}")
+        removed = cursor.rowcount
+        conn.commit()
+        return removed
+    finally:
+        cursor.close()
+
+
+def _extract(path):
+    # Runs in a worker: a PDF that can't be parsed is a result, not a failure of the pool
+    try:
+        return extract_text(path), None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+def _index_batch(cursor, pool, pending):
+    """
+    Spool, extract and store one batch (not committed). Returns
+    {"indexed": n, "failed": n}; raises BrokenProcessPool if a worker died.
+    """
+    totals = {"indexed": 0, "failed": 0}
+    futures, paths = {}, []
+    try:
+        # Workers parse earlier PDFs while later ones are still streaming in
+        for book_id, changed_at in pending:
+            path = _spool(cursor, book_id)
+            if path is None:
+                _store(cursor, book_id, changed_at, error="no PDF content")
+                totals["failed"] += 1
+                continue
+            paths.append(path)
+            futures[pool.submit(_extract, path)] = (book_id, changed_at)
+
+        for future in as_completed(futures):
+            book_id, changed_at = futures[future]
+            text, error = future.result()
+            if error is not None:
+                print(f"  book {book_id}: {error}")
+                totals["failed"] += 1
+            else:
+                totals["indexed"] += 1
+            _store(cursor, book_id, changed_at, text=text, error=error)
+    finally:
+        for future in futures:
+            future.cancel()
+        for path in paths:
+            os.unlink(path)
+    return totals
+
+
+def index_pending(conn, workers=INDEX_WORKERS, batch_size=BATCH_SIZE, limit=None):
+    """
+    Index every book whose PDF is new or changed, batch_size PDFs per commit,
+    stopping after `limit` books if given.
+    Returns {"indexed": books with text, "failed": books that couldn't be read}.
+
+    If a worker process dies (a PDF that crashes the parser or exhausts
+    memory), the batch is rolled back and retried one PDF at a time on a new
+    pool, so only the PDF that killed its worker is recorded as failed.
+    """
+    totals = {"indexed": 0, "failed": 0}
+    cursor = conn.cursor()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while limit is None or totals["indexed"] + totals["failed"] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - totals["indexed"] - totals["failed"])
+            cursor.execute(PENDING_SQL, {"batch_size": size})
+            pending = cursor.fetchall()
+            if not pending:
+                break
+
+            started = time.perf_counter()
+            try:
+                try:
+                    done = [_index_batch(cursor, pool, pending)]
+                    conn.commit()
+                except BrokenProcessPool:
+                    conn.rollback()
+                    print(f"  an extraction worker died; retrying {len(pending)} PDFs one at a time")
+                    done = []
+                    for book_id, changed_at in pending:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = ProcessPoolExecutor(max_workers=1)
+                        try:
+                            done.append(_index_batch(cursor, pool, [(book_id, changed_at)]))
+                        except BrokenProcessPool:
+                            conn.rollback()
+                            print(f"  book {book_id}: crashed the extraction worker")
+                            _store(cursor, book_id, changed_at, error="PDF crashed the extraction worker")
+                            done.append({"indexed": 0, "failed": 1})
+                        conn.commit()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+            except Exception:
+                conn.rollback()
+                raise
+            for counts in done:
+                totals["indexed"] += counts["indexed"]
+                totals["failed"] += counts["failed"]
+            print(f"  indexed {len(pending)} PDFs in {time.perf_counter() - started:.1f} s "
+                  f"({totals['indexed']} indexed, {totals['failed']} failed so far)")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        cursor.close()
+    return totals
@@ -0,0 +1,228 @@
+"""
+Facet counts (university, department, year) for the catalog page.
+
+Counts come from precomputed aggregates, one row per (university,
+department, year_published) with its book count:
+
+- the book_facets materialized view (migration 6), refreshed on commit;
+- when a database has no such view, an in-process summary of the same rows,
+  loaded with one GROUP BY, kept current by update() on local writes and
+  reloaded every FACET_SUMMARY_TTL seconds.
+
+Selected facets and a university / department / year keyword narrow the
+aggregate rows directly. A title or author keyword can't be answered from
+aggregates, so those counts come from one GROUP BY over the matching books;
+like search pages they are kept in result_cache until the catalog changes.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+import oracledb
+
+from services import catalog
+
+# Request argument -> column
+FACETS = {"university": "university", "department": "department", "year": "year_published"}
+MAX_VALUES = int(os.environ.get("FACET_MAX_VALUES", 15))  # values listed per facet
+SUMMARY_TTL = int(os.environ.get("FACET_SUMMARY_TTL", 300))  # seconds
+
+TABLE_MISSING = 942  # ORA-00942: book_facets doesn't exist
+
+# Keyword filters the aggregate rows can answer
+AGGREGATE_FILTERS = {"university", "department", "year_published"}
+
+
+def selected(args):
+    """The facets chosen in the request args, as {column: value}."""
+    chosen = {}
+    for name, column in FACETS.items():
+        value = args.get(name, "").strip()
+        if not value:
+            continue
+        if column == "year_published":
+            if not value.isdigit():
+                continue
+            value = int(value)
+        chosen[column] = value
+    return chosen
+
+
+def _where(filters):
+    # Every filter is always present with a NULL-tolerant bind: one statement per table
+    return " AND ".join([f"(:{name} IS NULL OR {catalog.SEARCH_FILTERS[name]} LIKE :{name})" for name in filters] +
+                        [f"(:eq_{column} IS NULL OR {column} = :eq_{column})" for column in catalog.FACET_COLUMNS])
+
+
+# Per facet, summed over the aggregate rows; one round trip for all three.
+# Years as text so the UNION ALL branches line up.
+FACET_COUNTS_SQL = "\nUNION ALL\n".join(
+    f"SELECT '{name}', {'TO_CHAR(year_published)' if column == 'year_published' else column}, SUM(book_count) "
+    f"FROM book_facets WHERE {_where(sorted(AGGREGATE_FILTERS))} GROUP BY {column}"
+    for name, column in FACETS.items()
+)
+
+# The matching books grouped once; summed per facet in Summary
+BOOK_COUNTS_SQL = f"""
+    SELECT {', '.join(catalog.FACET_COLUMNS)}, COUNT(*)
+    FROM university_books
+    WHERE {_where(list(catalog.SEARCH_FILTERS))}
+    GROUP BY {', '.join(catalog.FACET_COLUMNS)}
+"""
+
+INPUT_SIZES = {**catalog.SEARCH_INPUT_SIZES, "eq_university": oracledb.DB_TYPE_VARCHAR,
+               "eq_department": oracledb.DB_TYPE_VARCHAR, "eq_year_published": oracledb.DB_TYPE_NUMBER}
+
+
+# ---------------------------
+# In-process summary
+# ---------------------------
+class Summary:
+    """(university, department, year_published) -> book count for one database."""
+
+    def __init__(self, rows=()):
+        self.counts = Counter()
+        self.totals = None      # unfiltered facet counts, computed on first use
+        for university, department, year, count in rows:
+            self.counts[(university, department, year)] += int(count)
+
+    def update(self, book, delta):
+        key = tuple(book[column] for column in catalog.FACET_COLUMNS)
+        self.counts[key] += delta
+        if self.counts[key] <= 0:
+            del self.counts[key]
+        self.totals = None
+
+    def facet_counts(self, filters=None, chosen=None):
+        if not filters and not chosen:
+            if self.totals is None:
+                self.totals = self._count((), ())
+            return {name: Counter(totals) for name, totals in self.totals.items()}
+        positions = {column: i for i, column in enumerate(catalog.FACET_COLUMNS)}
+        selected = [(positions[column], value) for column, value in (chosen or {}).items()]
+        keywords = [(positions[name], keyword.lower()) for name, keyword in (filters or {}).items() if keyword]
+        return self._count(selected, keywords)
+
+    def _count(self, selected, keywords):
+        universities, departments, years = Counter(), Counter(), Counter()
+        for key, count in self.counts.items():
+            if any(key[i] != value for i, value in selected):
+                continue
+            if any(keyword not in str(key[i] or "").lower() for i, keyword in keywords):
+                continue
+            university, department, year = key
+            if university is not None:
+                universities[university] += count
+            if department is not None:
+                departments[department] += count
+            if year is not None:
+                years[str(year)] += count
+        return {"university": universities, "department": departments, "year": years}
+
+
+_summaries = {}        # source_name -> (loaded_at, Summary)
+_materialized = {}     # source_name -> bool, whether book_facets exists
+_lock = threading.Lock()
+
+
+def _summary(conn, source_name):
+    with _lock:
+        cached = _summaries.get(source_name)
+        if cached and time.monotonic() - cached[0] < SUMMARY_TTL:
+            return cached[1]
+
+    cursor = conn.cursor()
+    try:
+        catalog.tune(cursor)
+        cursor.execute(f"""
+            SELECT {', '.join(catalog.FACET_COLUMNS)}, COUNT(*)
+            FROM university_books
+            GROUP BY {', '.join(catalog.FACET_COLUMNS)}
+        """)
+        summary = Summary(cursor.fetchall())
+    finally:
+        cursor.close()
+
+    with _lock:
+        _summaries[source_name] = (time.monotonic(), summary)
+    return summary
+
+
+def update(source_name, old=None, new=None):
+    """Apply a committed write to the in-process summary (Book records or dicts, None for insert/delete)."""
+    with _lock:
+        cached = _summaries.get(source_name)
+        if not cached:
+            return
+        if old is not None:
+            cached[1].update(old, -1)
+        if new is not None:
+            cached[1].update(new, 1)
+
+
+# ---------------------------
+# Counts
+# ---------------------------
+def _facet_view_counts(conn, params):
+    cursor = conn.cursor()
+    try:
+        catalog.tune(cursor)
+        cursor.setinputsizes(**{name: INPUT_SIZES[name] for name in params})
+        cursor.execute(FACET_COUNTS_SQL, params)
+        counts = {name: Counter() for name in FACETS}
+        for name, value, count in cursor.fetchall():
+            if value is not None:
+                counts[name][value] += int(count)
+        return counts
+    finally:
+        cursor.close()
+
+
+def counts(conn, source_name, filters=None, chosen=None):
+    """
+    Book counts per facet value for one database, narrowed by the keyword
+    filters ({search_type: keyword}) and the selected facets ({column: value}).
+    Returns {facet name: Counter(value -> count)}.
+    """
+    filters = {name: keyword for name, keyword in (filters or {}).items()
+               if name in catalog.SEARCH_FILTERS and keyword}
+    chosen = chosen or {}
+    params = {f"eq_{column}": chosen.get(column) for column in catalog.FACET_COLUMNS}
+    keywords = {name: f"%{keyword.lower()}%" for name, keyword in filters.items()}
+
+    if not set(filters) <= AGGREGATE_FILTERS:
+        params.update({name: keywords.get(name) for name in catalog.SEARCH_FILTERS})
+        cursor = conn.cursor()
+        try:
+            catalog.tune(cursor)
+            cursor.setinputsizes(**INPUT_SIZES)
+            cursor.execute(BOOK_COUNTS_SQL, params)
+            return Summary(cursor.fetchall()).facet_counts()
+        finally:
+            cursor.close()
+
+    if _materialized.get(source_name, True):
+        try:
+            params.update({name: keywords.get(name) for name in AGGREGATE_FILTERS})
+            result = _facet_view_counts(conn, params)
+            _materialized[source_name] = True
+            return result
+        except oracledb.DatabaseError as e:
+            if getattr(e.args[0], "code", None) != TABLE_MISSING:
+                raise
+            # Migration 6 not applied on this database
+            _materialized[source_name] = False
+
+    return _summary(conn, source_name).facet_counts(filters, chosen)
+
+
+def top(counts):
+    """The MAX_VALUES largest values per facet as [(value, count)]; years newest first."""
+    listing = {}
+    for name, counter in counts.items():
+        values = counter.most_common(MAX_VALUES)
+        if name == "year":
+            values.sort(reverse=True)
+        listing[name] = values
+    return listing
@@ -0,0 +1,57 @@
+"""
+Cache of rendered template fragments: the catalog results table
+(books_table.html) and the librarian book-card grid (librarian/book_grid.html).
+
+A key is the fragment name, the endpoint and query parameters of the
+request, and the catalog version of every database the fragment shows
+(result_cache.catalog_version). Write paths call bump_catalog_version(), so
+after a change the old fragments are never looked up again; they age out
+through FRAGMENT_CACHE_TTL (remote writes made elsewhere are not seen as a
+bump) or the byte-bounded LRU.
+
+The cache is per process: rendered HTML is cheap to rebuild and is not worth
+a round trip to a shared store.
+"""
+import json
+import os
+import time
+
+from flask import request
+from markupsafe import Markup
+
+from services import metrics, result_cache
+from services.cache import ByteLRUCache
+
+FRAGMENT_CACHE_BYTES = int(os.environ.get("FRAGMENT_CACHE_BYTES", 32 * 1024 * 1024))
+FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", result_cache.RESULT_CACHE_TTL))  # seconds; 0 = off
+
+REQUESTS = metrics.Counter("fragment_cache_requests_total", "Rendered fragment lookups.", ("fragment", "result"))
+
+_cache = ByteLRUCache(FRAGMENT_CACHE_BYTES)
+
+
+def key(fragment, sources):
+    """Cache key of a fragment for the current request, showing books from `sources`."""
+    versions = ",".join(f"{source}={result_cache.catalog_version(source)}" for source in sources)
+    return json.dumps([fragment, request.endpoint, versions, sorted(request.args.items(multi=True))])
+
+
+def lookup(fragment, cache_key):
+    """The cached HTML as Markup, or None."""
+    entry = _cache.get(cache_key)
+    if entry is not None and time.monotonic() >= entry[0]:
+        _cache.delete(cache_key)
+        entry = None
+    REQUESTS.inc(fragment=fragment, result="miss" if entry is None else "hit")
+    return None if entry is None else Markup(entry[1])
+
+
+def store(cache_key, html, ttl=FRAGMENT_CACHE_TTL):
+    if ttl <= 0:
+        return
+    html = str(html)
+    _cache.set(cache_key, (time.monotonic() + ttl, html), size=len(html.encode("utf-8")))
+
+
+def clear():
+    _cache.clear()
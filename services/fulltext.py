@@ -0,0 +1,267 @@
+"""
+Ranked full-text search over title, author, university and department.
+
+Uses the Oracle Text CONTEXT index created by migrations/fulltext_index.py
+when the database has one, and otherwise an in-process inverted index built
+from the catalog metadata.
+
+The first search of a source builds that index; later rebuilds run on a
+background thread while searches keep using the old index: after
+FULLTEXT_INDEX_TTL seconds, when the source's catalog version changes
+(result_cache.bump_catalog_version, also from other processes) or when a
+write in this process calls invalidate(). Until the new index is in place
+current() is False, so callers don't cache the results.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+import oracledb
+
+from dbconnections.dbconnections import connection
+from services import catalog, result_cache
+
+# auto: Oracle Text when the index exists, python: always the in-process index
+FULLTEXT_BACKEND = os.environ.get("FULLTEXT_BACKEND", "auto")
+INDEX_TTL = int(os.environ.get("FULLTEXT_INDEX_TTL", 300))  # seconds before the python index is rebuilt
+
+FIELDS = ("title", "author", "university", "department")
+FIELD_WEIGHTS = {"title": 3.0, "author": 2.0, "university": 1.0, "department": 1.0}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Errors meaning the CONTEXT index (or Oracle Text) isn't there, as opposed to a failed search
+MISSING_INDEX_CODES = {
+    "ORA-00942",  # table or view does not exist
+    "ORA-20000",  # Oracle Text error (DRG-10599: column is not indexed)
+}
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower()) if text else []
+
+
+# ---------------------------
+# Oracle Text
+# ---------------------------
+def oracle_text_query(keyword):
+    """
+    Turn user input into a CONTAINS query: every word must match and the
+    last one is a prefix, so partially typed words still hit.
+    """
+    tokens = tokenize(keyword)
+    if not tokens:
+        return None
+    terms = [f"{{{t}}}" for t in tokens[:-1]] + [f"{tokens[-1]}%"]
+    return " AND ".join(terms)
+
+
+def _search_oracle_text(conn, source_name, keyword, limit):
+    cursor = conn.cursor()
+    try:
+        return catalog.fetch_books(cursor, f"""
+            SELECT {catalog.BOOK_COLUMNS}, SCORE(1)
+            FROM university_books
+            WHERE CONTAINS(title, :query, 1) > 0
+            ORDER BY SCORE(1) DESC, book_id
+            FETCH FIRST :page_limit ROWS ONLY
+        """, {"query": oracle_text_query(keyword), "page_limit": limit}, source_name, rows=limit)
+    finally:
+        cursor.close()
+
+
+# ---------------------------
+# In-process inverted index
+# ---------------------------
+class InvertedIndex:
+    """Token -> postings index over the catalog metadata with TF-IDF ranking."""
+
+    def __init__(self, rows=()):
+        self.docs = {}
+        self.postings = defaultdict(dict)   # token -> {book_id: weighted term frequency}
+        self.vocabulary = []                # sorted tokens, for prefix lookups
+        for row in rows:
+            self.add(row)
+        self.vocabulary = sorted(self.postings)
+
+    def add(self, row):
+        """row is (book_id, title, author, university, department, year_published)."""
+        book_id = row[0]
+        self.docs[book_id] = row
+        for field, value in zip(FIELDS, row[1:5]):
+            for token in tokenize(value):
+                postings = self.postings[token]
+                postings[book_id] = postings.get(book_id, 0.0) + FIELD_WEIGHTS[field]
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        start = bisect_left(self.vocabulary, token)
+        matches = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, keyword, limit=50):
+        """Return [(score, book_id)] for docs matching every word (last word as prefix)."""
+        tokens = tokenize(keyword)
+        if not tokens or not self.docs:
+            return []
+
+        total = len(self.docs)
+        scores = None
+        for i, token in enumerate(tokens):
+            token_scores = defaultdict(float)
+            for term in self._expand(token, prefix=i == len(tokens) - 1):
+                postings = self.postings[term]
+                idf = math.log(1 + total / len(postings))
+                for book_id, tf in postings.items():
+                    token_scores[book_id] += tf * idf
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {b: s + token_scores[b] for b, s in scores.items() if b in token_scores}
+            if not scores:
+                return []
+
+        return heapq.nlargest(limit, ((s, b) for b, s in scores.items()), key=lambda hit: (hit[0], -hit[1]))
+
+
+_indexes = {}          # source_name -> (built_at, catalog version, InvertedIndex)
+_rebuilding = {}       # source_name -> True if another rebuild is wanted once the running one ends
+_first_build = {}      # source_name -> lock held while the first index is built
+_oracle_text = {}      # source_name -> monotonic time the CONTEXT index was found missing
+_lock = threading.Lock()
+
+
+def _load(conn):
+    cursor = conn.cursor()
+    try:
+        catalog.tune(cursor)
+        cursor.execute(f"SELECT {catalog.BOOK_COLUMNS} FROM university_books")
+        return InvertedIndex(cursor)
+    finally:
+        cursor.close()
+
+
+def _rebuild(source_name):
+    # Background thread: one per source at a time; runs again if invalidated meanwhile
+    try:
+        while True:
+            version = result_cache.catalog_version(source_name)
+            with connection(source_name.lower()) as conn:
+                index = _load(conn)
+            with _lock:
+                _indexes[source_name] = (time.monotonic(), version, index)
+                if not _rebuilding[source_name]:
+                    break
+                _rebuilding[source_name] = False
+    except Exception as e:
+        print(f"Full-text index: rebuilding {source_name} failed: {e}")
+    finally:
+        with _lock:
+            _rebuilding.pop(source_name, None)
+
+
+def _start_rebuild(source_name):
+    # Called with _lock held
+    if source_name in _rebuilding:
+        _rebuilding[source_name] = True
+        return
+    _rebuilding[source_name] = False
+    threading.Thread(target=_rebuild, args=(source_name,), name=f"fulltext-index-{source_name.lower()}",
+                     daemon=True).start()
+
+
+def invalidate(source_name=None):
+    """
+    A write changed one source's catalog (or all): rebuild its index in
+    the background. Searches use the old index until the new one is ready.
+    """
+    with _lock:
+        for name in ([source_name] if source_name else list(_indexes)):
+            if name in _indexes:
+                _start_rebuild(name)
+
+
+def current(source_name):
+    """False while searches of source_name use an index older than its catalog version."""
+    with _lock:
+        cached = _indexes.get(source_name)
+    return cached is None or cached[1] == result_cache.catalog_version(source_name)
+
+
+def _python_index(conn, source_name):
+    # Writes in other processes bump the shared catalog version; rebuild on a change
+    version = result_cache.catalog_version(source_name)
+    with _lock:
+        cached = _indexes.get(source_name)
+        if cached:
+            if cached[1] != version or time.monotonic() - cached[0] >= INDEX_TTL:
+                _start_rebuild(source_name)
+            return cached[2]
+        first_build = _first_build.setdefault(source_name, threading.Lock())
+
+    # No index yet: one request builds it, concurrent ones wait for it
+    with first_build:
+        with _lock:
+            cached = _indexes.get(source_name)
+        if cached:
+            return cached[2]
+        index = _load(conn)
+        with _lock:
+            _indexes[source_name] = (time.monotonic(), version, index)
+        return index
+
+
+def _search_python(conn, source_name, keyword, limit):
+    index = _python_index(conn, source_name)
+    books = []
+    for score, book_id in index.search(keyword, limit):
+        books.append(catalog.Book(*index.docs[book_id], source=source_name, score=score))
+    return books
+
+
+def index_missing(error):
+    """True if `error` says the CONTEXT index isn't there (any other error is a real failure)."""
+    info = error.args[0] if error.args else None
+    return getattr(info, "full_code", None) in MISSING_INDEX_CODES or "DRG-10599" in str(info)
+
+
+def _use_oracle_text(source_name):
+    # A missing index is looked for again after INDEX_TTL, so creating it needs no restart
+    if FULLTEXT_BACKEND == "python":
+        return False
+    with _lock:
+        missing_at = _oracle_text.get(source_name)
+        return missing_at is None or time.monotonic() - missing_at >= INDEX_TTL
+
+
+def search(conn, source_name, keyword, limit=50):
+    """
+    Ranked search across all metadata fields of one database.
+    Returns catalog.Book records (as query_books does) with a score, best first.
+    """
+    if not tokenize(keyword):
+        return []
+
+    if _use_oracle_text(source_name):
+        try:
+            books = _search_oracle_text(conn, source_name, keyword, limit)
+            with _lock:
+                _oracle_text.pop(source_name, None)
+            return books
+        except oracledb.DatabaseError as e:
+            if not index_missing(e):
+                raise
+            with _lock:
+                _oracle_text[source_name] = time.monotonic()
+
+    return _search_python(conn, source_name, keyword, limit)
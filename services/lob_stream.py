@@ -0,0 +1,144 @@
+import os
+import re
+import time
+from urllib.parse import quote
+
+from flask import Response, request
+
+from services import metrics
+
+# Bytes per read; rounded down to a multiple of the LOB chunk size
+READ_SIZE = int(os.environ.get("LOB_READ_SIZE", 256 * 1024))
+
+
+class BytesLob:
+    """Minimal LOB interface over bytes, for values already fetched in memory."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def size(self):
+        return len(self.data)
+
+    def getchunksize(self):
+        return 8132
+
+    def read(self, offset=1, amount=None):
+        start = offset - 1
+        return self.data[start:] if amount is None else self.data[start:start + amount]
+
+
+def lob_etag(*parts, changed_at=None):
+    """
+    ETag for a stored LOB from its identifying parts plus the time it last
+    changed (e.g. university_books.pdf_changed_at), so replacing it with one
+    of the same size still changes the tag. Without a change time the tag is
+    the parts alone.
+    """
+    if changed_at is None:
+        return "-".join(str(part) for part in parts)
+    if hasattr(changed_at, "timestamp"):
+        stamp = format(int(changed_at.timestamp() * 1_000_000), "x")
+    else:
+        stamp = re.sub(r"[^0-9A-Za-z]", "", str(changed_at))
+    return "-".join(str(part) for part in (*parts, stamp))
+
+
+def _read_size(lob):
+    chunk = lob.getchunksize() or READ_SIZE
+    return chunk * max(1, READ_SIZE // chunk)
+
+
+def read_chunks(lob, start=0, end=None, endpoint=None):
+    """Yield the LOB's bytes start..end (inclusive, 0-based) in chunk-aligned reads."""
+    if end is None:
+        end = lob.size() - 1
+    read_size = _read_size(lob)
+    in_memory = isinstance(lob, BytesLob)
+    offset = start
+    while offset <= end:
+        # First read may be short so every following read starts on a chunk boundary
+        amount = min(read_size - (offset % read_size), end - offset + 1)
+        started = time.perf_counter()
+        data = lob.read(offset + 1, amount)
+        if not data:
+            break
+        if not in_memory:
+            metrics.record_lob("read", len(data), time.perf_counter() - started, endpoint)
+        yield data
+        offset += len(data)
+
+
+def write_stream(lob, stream):
+    """
+    Copy a file-like object (e.g. a werkzeug FileStorage stream) into a LOB
+    in chunk-aligned writes; returns the number of bytes written.
+    """
+    read_size = _read_size(lob)
+    offset = 1
+    for data in iter(lambda: stream.read(read_size), b""):
+        started = time.perf_counter()
+        lob.write(data, offset)
+        metrics.record_lob("write", len(data), time.perf_counter() - started)
+        offset += len(data)
+    return offset - 1
+
+
+def _iter_lob(lob, start, end, resources, endpoint):
+    try:
+        yield from read_chunks(lob, start, end, endpoint)
+    finally:
+        _close(resources)
+
+
+def _close(resources):
+    for resource in resources:
+        try:
+            resource.close()
+        except Exception:
+            pass
+
+
+def send_lob(lob, download_name, mimetype="application/pdf", etag=None, resources=()):
+    """
+    Stream an Oracle LOB (or bytes) to the client without reading it into memory.
+
+    Honours Range / If-Range so PDF viewers can seek and resume. The cursor
+    and connection passed in `resources` are closed once the response has
+    been sent, so the caller must not close them itself.
+    """
+    if not hasattr(lob, "read"):
+        lob = BytesLob(lob)
+
+    size = lob.size()
+    start, end = 0, size - 1
+    status = 200
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(download_name)}",
+    }
+    if etag:
+        headers["ETag"] = f'"{etag}"'
+
+    # If-Range: only honour the range when the client's copy is still current
+    if_range = request.if_range
+    range_valid = not (if_range.etag or if_range.date) or (etag is not None and if_range.etag == etag)
+
+    if request.range and range_valid:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            _close(resources)
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+        start, end = byte_range[0], byte_range[1] - 1
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    # The body is read after the request context is gone, so label it now
+    response = Response(_iter_lob(lob, start, end, resources, request.endpoint), status=status, mimetype=mimetype,
+                        headers=headers, direct_passthrough=True)
+    # Covers HEAD requests and clients that disconnect before the body is consumed
+    response.call_on_close(lambda: _close(resources))
+    return response
@@ -0,0 +1,356 @@
+"""
+Request and database instrumentation, exported in Prometheus text format.
+
+dbconnections wraps every connection it hands out with instrument_connection(),
+so SQL executes, fetches, commits and connection acquisition are timed without
+touching the blueprints. routes/metrics.py adds the per-request hooks and the
+/metrics endpoint. Work a request hands to another thread (the federated
+search pool) is wrapped with for_request() so it is counted for that request.
+
+Round trips are counted per execute / executemany / commit / rollback plus
+one per `arraysize` rows fetched, which is what the driver does for plain
+queries; LOB calls are counted by lob_stream.
+
+Set METRICS_ENABLED=0 to hand out the raw driver connections instead.
+"""
+import bisect
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+# ---------------------------
+# Metric types
+# ---------------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self.values)
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}    # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(entry) for key, entry in self.values.items()}
+        for key, entry in values.items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": repr(bound)}, cumulative
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, entry[-1]
+            yield f"{self.name}_sum", labels, entry[-2]
+            yield f"{self.name}_count", labels, entry[-1]
+
+
+class GaugeFunc:
+    """Gauge whose samples come from a callback returning [(labels dict, value)]."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        REGISTRY.append(self)
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield self.name, labels, value
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to build the response, per endpoint.",
+                            ("endpoint", "method", "status"))
+ACQUIRE_SECONDS = Histogram("db_connection_acquire_seconds", "Time to get a connection from the pool or connect.",
+                            ("source",))
+DB_SECONDS = Histogram("db_operation_duration_seconds", "Time spent in database calls.", ("operation",))
+TEMPLATE_SECONDS = Histogram("template_render_duration_seconds", "Jinja template render time.", ("template",))
+ROUND_TRIPS = Counter("db_round_trips_total", "Database round trips.", ("endpoint",))
+ROWS_FETCHED = Counter("db_rows_fetched_total", "Rows fetched from the database.", ("endpoint",))
+LOB_BYTES = Counter("lob_bytes_total", "LOB bytes streamed.", ("endpoint", "direction"))
+
+_waiting = {}
+_waiting_lock = threading.Lock()
+
+# (endpoint, stats) of the request a worker thread is running a task for
+_bound_request = contextvars.ContextVar("metrics_bound_request", default=None)
+_stats_lock = threading.Lock()
+
+
+# ---------------------------
+# Per-request accounting
+# ---------------------------
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "-"
+    bound = _bound_request.get()
+    return bound[0] if bound else "-"
+
+
+def request_stats():
+    """Timings accumulated for the current request (None outside a request)."""
+    if not has_request_context():
+        bound = _bound_request.get()
+        return bound[1] if bound else None
+    if "db_stats" not in g:
+        g.db_stats = {"acquire": 0.0, "db": 0.0, "lob": 0.0, "render": 0.0, "round_trips": 0, "rows": 0}
+    return g.db_stats
+
+
+def for_request(fn):
+    """
+    Wrap fn to run on another thread (e.g. a ThreadPoolExecutor) on behalf of
+    the current request: its database work is counted under the request's
+    endpoint and in its Server-Timing stats. No request context is pushed.
+    """
+    bound = (_endpoint(), request_stats())
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        token = _bound_request.set(bound)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _bound_request.reset(token)
+    return run
+
+
+def _add(stats, **amounts):
+    # Worker threads may add to the same request's stats concurrently
+    with _stats_lock:
+        for name, amount in amounts.items():
+            stats[name] += amount
+
+
+def record_db(operation, seconds, round_trips=1, rows=0):
+    DB_SECONDS.observe(seconds, operation=operation)
+    endpoint = _endpoint()
+    if round_trips:
+        ROUND_TRIPS.inc(round_trips, endpoint=endpoint)
+    if rows:
+        ROWS_FETCHED.inc(rows, endpoint=endpoint)
+    stats = request_stats()
+    if stats is not None:
+        _add(stats, db=seconds, round_trips=round_trips, rows=rows)
+
+
+def record_lob(direction, nbytes, seconds, endpoint=None):
+    """LOB traffic; `endpoint` is passed explicitly for reads done while a response streams."""
+    endpoint = endpoint or _endpoint()
+    DB_SECONDS.observe(seconds, operation=f"lob_{direction}")
+    LOB_BYTES.inc(nbytes, endpoint=endpoint, direction=direction)
+    ROUND_TRIPS.inc(1, endpoint=endpoint)
+    stats = request_stats()
+    if stats is not None:
+        _add(stats, lob=seconds, round_trips=1)
+
+
+@contextmanager
+def acquiring(source):
+    """Time a connection acquisition and count the callers waiting for one."""
+    with _waiting_lock:
+        _waiting[source] = _waiting.get(source, 0) + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _waiting_lock:
+            _waiting[source] -= 1
+        ACQUIRE_SECONDS.observe(seconds, source=source)
+        stats = request_stats()
+        if stats is not None:
+            _add(stats, acquire=seconds)
+
+
+def waiting(source):
+    with _waiting_lock:
+        return _waiting.get(source, 0)
+
+
+# ---------------------------
+# Driver wrappers
+# ---------------------------
+class InstrumentedCursor:
+    """Delegates to an oracledb cursor, timing executes and fetches."""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_fetched", 0)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _timed(self, operation, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_db(operation, time.perf_counter() - start)
+
+    def _record_fetch(self, rows, seconds):
+        # The driver fetches `arraysize` rows per round trip
+        before = self._fetched
+        object.__setattr__(self, "_fetched", before + rows)
+        arraysize = self._cursor.arraysize or 1
+        record_db("fetch", seconds, round_trips=(before + rows) // arraysize - before // arraysize, rows=rows)
+
+    def execute(self, statement, *args, **kwargs):
+        object.__setattr__(self, "_fetched", 0)
+        result = self._timed("execute", self._cursor.execute, statement, *args, **kwargs)
+        return self if result is self._cursor else result
+
+    def executemany(self, statement, *args, **kwargs):
+        return self._timed("executemany", self._cursor.executemany, statement, *args, **kwargs)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._record_fetch(0 if row is None else 1, time.perf_counter() - start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany() if size is None else self._cursor.fetchmany(size)
+        self._record_fetch(len(rows), time.perf_counter() - start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._record_fetch(len(rows), time.perf_counter() - start)
+        return rows
+
+    def __iter__(self):
+        rows = iter(self._cursor)
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            self._record_fetch(1, time.perf_counter() - start)
+            yield row
+
+
+class InstrumentedConnection:
+    """Delegates to an oracledb connection; cursors, commits and rollbacks are timed."""
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._conn.close()
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            record_db("commit", time.perf_counter() - start)
+
+    def rollback(self):
+        start = time.perf_counter()
+        try:
+            self._conn.rollback()
+        finally:
+            record_db("rollback", time.perf_counter() - start)
+
+
+def instrument_connection(conn):
+    return InstrumentedConnection(conn) if METRICS_ENABLED else conn
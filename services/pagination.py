@@ -0,0 +1,101 @@
+import base64
+import json
+import os
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = 200
+
+
+def page_size(args):
+    """Read ?page_size= from the request args, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(args.get("page_size", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+# ---------------------------
+# Page tokens
+# ---------------------------
+def encode_token(sort_value, row_id, source=None, backwards=False):
+    """Build an opaque ?page= token from the row a page starts/ends on."""
+    data = {"v": sort_value, "id": row_id, "src": source, "back": backwards}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Return the position dict of a ?page= token, or None for the first page."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(data, dict) or "id" not in data:
+            return None
+        return data
+    except ValueError:
+        return None
+
+
+# ---------------------------
+# SQL fragments
+# ---------------------------
+def order_by(sort_col, id_col, backwards=False):
+    """ORDER BY for (sort_col NULLS LAST, id_col), or its exact reverse."""
+    if sort_col == id_col:
+        return f" ORDER BY {id_col} {'DESC' if backwards else 'ASC'}"
+    if backwards:
+        return f" ORDER BY {sort_col} DESC NULLS FIRST, {id_col} DESC"
+    return f" ORDER BY {sort_col} ASC NULLS LAST, {id_col} ASC"
+
+
+def keyset_condition(sort_col, id_col, position, inclusive=False):
+    """
+    WHERE fragment and binds selecting the rows after the given position
+    (before it when position["back"] is set) in order_by() order.
+    sort_col and id_col must already be whitelisted column names.
+
+    inclusive also keeps the position row itself. It moves the bound by one
+    (ids are integers) instead of changing the operator, so the SQL text
+    stays the same either way.
+    """
+    backwards = position.get("back", False)
+    op = "<" if backwards else ">"
+    row_id = position["id"]
+    if inclusive:
+        row_id = row_id + 1 if backwards else row_id - 1
+    binds = {"ks_id": row_id}
+
+    if sort_col == id_col:
+        return f"{id_col} {op} :ks_id", binds
+
+    value = position.get("v")
+    if value is None:
+        if backwards:
+            return f"({sort_col} IS NOT NULL OR {id_col} {op} :ks_id)", binds
+        return f"({sort_col} IS NULL AND {id_col} {op} :ks_id)", binds
+
+    binds["ks_val"] = value
+    if backwards:
+        return f"({sort_col} < :ks_val OR ({sort_col} = :ks_val AND {id_col} {op} :ks_id))", binds
+    return f"({sort_col} > :ks_val OR ({sort_col} = :ks_val AND {id_col} {op} :ks_id) OR {sort_col} IS NULL)", binds
+
+
+def build_page(rows, size, position, key):
+    """
+    Turn the (up to size + 1) rows fetched for a page into
+    (rows, next_token, prev_token). key(row) returns (sort_value, id, source).
+    """
+    backwards = bool(position and position.get("back"))
+    has_more = len(rows) > size
+    rows = list(rows[:size])
+    if backwards:
+        rows.reverse()
+
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else position is not None
+
+    next_token = encode_token(*key(rows[-1])) if rows and has_next else None
+    prev_token = encode_token(*key(rows[0]), backwards=True) if rows and has_prev else None
+    return rows, next_token, prev_token
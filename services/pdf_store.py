@@ -0,0 +1,59 @@
+"""
+Content-addressed PDF store.
+
+Every distinct PDF saved into a user library is kept once in the local
+pdf_store table, keyed by the SHA-256 of its bytes. user_library rows only
+point at it through pdf_sha256.
+"""
+import hashlib
+
+import oracledb
+
+from services.lob_stream import read_chunks
+
+
+def sha256_of_lob(lob):
+    """Hash a LOB (or bytes) without holding the whole value in memory."""
+    digest = hashlib.sha256()
+    if hasattr(lob, "read"):
+        for chunk in read_chunks(lob):
+            digest.update(chunk)
+    else:
+        digest.update(lob)
+    return digest.hexdigest()
+
+
+def store_from(cursor, table, where, params):
+    """
+    Add the pdf_file selected by `SELECT pdf_file FROM {table} WHERE {where}`
+    to the store and return its SHA-256, or None if there is no PDF.
+
+    The bytes are streamed once through Python to hash them; the copy itself
+    is an INSERT ... SELECT, so the BLOB never sits in worker memory and is
+    only written when the store does not hold that content yet.
+    """
+    cursor.execute(f"SELECT pdf_file FROM {table} WHERE {where}", params)
+    row = cursor.fetchone()
+    if not row or not row[0]:
+        return None
+
+    sha = sha256_of_lob(row[0])
+    cursor.execute("SELECT COUNT(*) FROM pdf_store WHERE sha256 = :1", (sha,))
+    if cursor.fetchone()[0] == 0:
+        try:
+            cursor.execute(f"""
+                INSERT INTO pdf_store (sha256, pdf_file, byte_size, created_at)
+                SELECT :sha, pdf_file, DBMS_LOB.GETLENGTH(pdf_file), SYSTIMESTAMP
+                FROM {table}
+                WHERE {where}
+            """, {"sha": sha, **params})
+        except oracledb.IntegrityError:
+            pass  # stored concurrently by another request
+    return sha
+
+
+def fetch(cursor, sha):
+    """Return the stored LOB for a SHA-256, or None."""
+    cursor.execute("SELECT pdf_file FROM pdf_store WHERE sha256 = :1", (sha,))
+    row = cursor.fetchone()
+    return row[0] if row else None
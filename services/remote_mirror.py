@@ -0,0 +1,187 @@
+"""
+Local read-only mirror of the remote catalog's metadata (no PDFs).
+
+sync() runs on a local connection and reads the remote database over the
+remote_uni DB link. Each run only transfers what changed since the last
+one, using the marks kept in mirror_sync_state (migration 7):
+
+- rows with book_id above the highest one mirrored, or with updated_at
+  after the last change seen, are replaced in remote_books_mirror;
+- book_ids recorded in book_deletions since the last delete seen are
+  removed from it.
+
+Marks are re-read with a SYNC_OVERLAP_SECONDS margin, so a transaction that
+commits after a later one isn't missed. The copy and the new marks are
+committed together.
+
+Search answers remote queries from the mirror while the last sync is at
+most REMOTE_MIRROR_MAX_AGE seconds old (0 turns the mirror off), and falls
+back to live queries otherwise. Staleness is measured against the clock of
+the process that ran the sync, so run it on a host with the same time.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import oracledb
+
+from services import catalog
+
+NAME = "remote"
+TABLE = "remote_books_mirror"
+REMOTE_TABLE = "university_books@remote_uni"
+DELETIONS_TABLE = "book_deletions@remote_uni"
+
+MAX_AGE = int(os.environ.get("REMOTE_MIRROR_MAX_AGE", 300))  # seconds; 0 = always query live
+SYNC_INTERVAL = int(os.environ.get("REMOTE_MIRROR_SYNC_INTERVAL", 60))  # seconds between runs with --loop
+SYNC_OVERLAP = int(os.environ.get("SYNC_OVERLAP_SECONDS", 300))
+CHECK_INTERVAL = 10  # seconds a freshness check is reused
+
+_checked = {"at": None, "fresh": False}   # last freshness check (monotonic time, result)
+_lock = threading.Lock()
+
+MIRROR_COLUMNS = f"{catalog.BOOK_COLUMNS}, updated_at"
+
+# Rows new or changed since the marks
+CHANGED = f"""
+    FROM {REMOTE_TABLE}
+    WHERE book_id > :max_book_id
+       OR updated_at > :changed_since - NUMTODSINTERVAL(:overlap, 'SECOND')
+"""
+
+
+# ---------------------------
+# Sync
+# ---------------------------
+def _state(cursor):
+    cursor.execute("""
+        SELECT max_book_id, changed_since, deleted_since
+        FROM mirror_sync_state
+        WHERE name = :name
+    """, {"name": NAME})
+    return cursor.fetchone() or (0, None, None)
+
+
+def sync(conn):
+    """
+    Bring the mirror up to date. Returns {"changed": rows copied,
+    "deleted": rows removed}.
+    """
+    started = datetime.now()
+    cursor = conn.cursor()
+    try:
+        max_book_id, changed_since, deleted_since = _state(cursor)
+        marks = {"max_book_id": max_book_id or 0, "changed_since": changed_since, "overlap": SYNC_OVERLAP}
+
+        cursor.execute(f"DELETE FROM {TABLE} WHERE book_id IN (SELECT book_id {CHANGED})", marks)
+        cursor.execute(f"INSERT INTO {TABLE} ({MIRROR_COLUMNS}) SELECT {MIRROR_COLUMNS} {CHANGED}", marks)
+        changed = cursor.rowcount
+
+        catalog.tune(cursor)
+        cursor.execute(f"""
+            SELECT book_id, deleted_at
+            FROM {DELETIONS_TABLE}
+            WHERE :deleted_since IS NULL
+               OR deleted_at > :deleted_since - NUMTODSINTERVAL(:overlap, 'SECOND')
+        """, {"deleted_since": deleted_since, "overlap": SYNC_OVERLAP})
+        deletions = cursor.fetchall()
+        if deletions:
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE book_id = :1", [(book_id,) for book_id, _ in deletions])
+            deleted_since = max(deleted_at for _, deleted_at in deletions)
+
+        cursor.execute(f"SELECT MAX(book_id), MAX(updated_at) FROM {TABLE}")
+        mirrored_id, mirrored_change = cursor.fetchone()
+        cursor.execute("""
+            MERGE INTO mirror_sync_state s
+            USING (SELECT :name AS name FROM dual) src
+            ON (s.name = src.name)
+            WHEN MATCHED THEN
+                UPDATE SET max_book_id = :max_book_id, changed_since = :changed_since,
+                           deleted_since = :deleted_since, synced_at = :synced_at
+            WHEN NOT MATCHED THEN
+                INSERT (name, max_book_id, changed_since, deleted_since, synced_at)
+                VALUES (:name, :max_book_id, :changed_since, :deleted_since, :synced_at)
+        """, {"name": NAME, "max_book_id": max(mirrored_id or 0, marks["max_book_id"]),
+              "changed_since": mirrored_change or changed_since, "deleted_since": deleted_since,
+              "synced_at": started})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    with _lock:
+        _checked.update(at=time.monotonic(), fresh=MAX_AGE > 0)
+    return {"changed": changed, "deleted": len(deletions)}
+
+
+# ---------------------------
+# Freshness
+# ---------------------------
+
+FRESH_SQL = """
+    SELECT COUNT(*)
+    FROM mirror_sync_state
+    WHERE name = :name AND synced_at >= :cutoff
+"""
+
+
+def _cached_check():
+    """The last freshness result while it may be reused, else None."""
+    if MAX_AGE <= 0:
+        return False
+    with _lock:
+        if _checked["at"] is not None and time.monotonic() - _checked["at"] < CHECK_INTERVAL:
+            return _checked["fresh"]
+    return None
+
+
+def _fresh_params():
+    return {"name": NAME, "cutoff": datetime.now() - timedelta(seconds=MAX_AGE)}
+
+
+def _remember(result):
+    with _lock:
+        _checked.update(at=time.monotonic(), fresh=result)
+    return result
+
+
+def fresh(conn):
+    """Whether searches may read the mirror: the last sync is at most MAX_AGE seconds old."""
+    result = _cached_check()
+    if result is not None:
+        return result
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(FRESH_SQL, _fresh_params())
+        result = cursor.fetchone()[0] > 0
+    except oracledb.DatabaseError:
+        # Migration 7 not applied on the local database
+        result = False
+    finally:
+        cursor.close()
+    return _remember(result)
+
+
+async def fresh_async(conn):
+    """fresh() on an async connection."""
+    result = _cached_check()
+    if result is not None:
+        return result
+
+    with conn.cursor() as cursor:
+        try:
+            await cursor.execute(FRESH_SQL, _fresh_params())
+            result = (await cursor.fetchone())[0] > 0
+        except oracledb.DatabaseError:
+            result = False
+    return _remember(result)
+
+
+def stale():
+    """Stop reading the mirror until the next freshness check (after a failed mirror query)."""
+    with _lock:
+        _checked.update(at=time.monotonic(), fresh=False)
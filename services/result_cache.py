@@ -0,0 +1,162 @@
+"""
+Search result cache for books.index.
+
+Entries are keyed by (db_source, filter, keyword, sort, page, page_size,
+facets) plus the catalog version of every database the search touched. Write paths call
+bump_catalog_version(), so after a change the old keys are simply never
+looked up again and age out through the TTL / LRU.
+
+Backends:
+    in-process LRU (default)        bounded by RESULT_CACHE_BYTES
+    shared store                    RESULT_CACHE_URL=redis://host:6379/0
+                                    (needs the redis package), or
+                                    RESULT_CACHE_URL=memory:// for a local stub
+
+With several worker processes use a shared store: an in-process version
+bump is only seen by the worker that handled the write.
+"""
+import json
+import os
+import threading
+import time
+
+from services.cache import ByteLRUCache
+from services.catalog import json_default
+
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 60))  # seconds
+RESULT_CACHE_BYTES = int(os.environ.get("RESULT_CACHE_BYTES", 64 * 1024 * 1024))
+RESULT_CACHE_URL = os.environ.get("RESULT_CACHE_URL", "")
+
+
+class MemoryBackend:
+    """Per-process LRU with TTL; catalog versions live in a dict."""
+
+    def __init__(self, max_bytes):
+        self.entries = ByteLRUCache(max_bytes)
+        self.versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self.entries.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        self.entries.set(key, (time.monotonic() + ttl, value), size=len(json.dumps(value, default=json_default)))
+
+    def version(self, source):
+        return self.versions.get(source, 0)
+
+    def bump(self, source):
+        with self._lock:
+            self.versions[source] = self.versions.get(source, 0) + 1
+
+
+class SharedBackend:
+    """
+    Store shared by every worker. `client` needs the redis-py subset
+    get(key), set(key, value, ex=seconds) and incr(key).
+    """
+
+    def __init__(self, client, prefix="uniarchive:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value, default=json_default), ex=ttl)
+
+    def version(self, source):
+        return int(self.client.get(f"{self.prefix}version:{source}") or 0)
+
+    def bump(self, source):
+        self.client.incr(f"{self.prefix}version:{source}")
+
+
+class DictStore:
+    """Local stand-in for a shared store (get / set with ex / incr)."""
+
+    def __init__(self):
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self.data.get(key, (None, None))
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self.data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self.data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self.data.get(key, (0, None))[0]) + 1
+            self.data[key] = (value, None)
+            return value
+
+
+def create_backend(url=RESULT_CACHE_URL):
+    if not url:
+        return MemoryBackend(RESULT_CACHE_BYTES)
+    if url.startswith("memory://"):
+        return SharedBackend(DictStore())
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError("RESULT_CACHE_URL needs the 'redis' package (pip install redis)")
+    return SharedBackend(redis.Redis.from_url(url))
+
+
+backend = create_backend()
+
+
+# ---------------------------
+# Catalog versions
+# ---------------------------
+def catalog_version(source):
+    return backend.version(source.lower())
+
+
+def bump_catalog_version(source):
+    """Call after every committed write to a database's university_books."""
+    backend.bump(source.lower())
+
+
+# ---------------------------
+# Search results
+# ---------------------------
+def _versions(sources):
+    return ",".join(f"{s}={catalog_version(s)}" for s in sources)
+
+
+def search_key(sources, search_type, keyword, sort, page, page_size, facets=None):
+    return "search:" + json.dumps(
+        [_versions(sources), search_type or "", (keyword or "").lower(), sort or "", page or "", page_size,
+         sorted((facets or {}).items())]
+    )
+
+
+def facets_key(sources, search_type, keyword, facets=None):
+    return "facets:" + json.dumps(
+        [_versions(sources), search_type or "", (keyword or "").lower(), sorted((facets or {}).items())]
+    )
+
+
+def lookup(key):
+    return backend.get(key)
+
+
+def store(key, value, ttl=RESULT_CACHE_TTL):
+    backend.set(key, value, ttl)
@@ -0,0 +1,77 @@
+"""
+Fingerprinted static assets (built by commands/build_static.py).
+
+When static/dist/manifest.json exists:
+- url_for("static", filename="style.css") points at the content-hashed copy,
+  e.g. /static/dist/style.3f9c2a1b7e4d.css, so templates don't change;
+- hashed files are served with a one-year "immutable" Cache-Control, so
+  browsers don't even revalidate them on repeat views: a changed file gets
+  a new name;
+- the pre-built .br or .gz variant is sent when Accept-Encoding allows it.
+
+Without a manifest (development) assets are served by Flask as before.
+"""
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+MAX_AGE = 365 * 24 * 3600
+
+# Accept-Encoding token -> file suffix, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+_assets = {}    # logical name -> {"path": hashed path, "encodings": [...]}
+_hashed = {}    # hashed path -> encodings available
+
+
+def load(static_folder):
+    """Read the manifest; returns the number of fingerprinted assets."""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            assets = json.load(f)
+    except FileNotFoundError:
+        assets = {}
+    _assets.clear()
+    _assets.update(assets)
+    _hashed.clear()
+    _hashed.update({entry["path"]: entry.get("encodings", []) for entry in assets.values()})
+    return len(assets)
+
+
+def _fingerprint(endpoint, values):
+    # url_defaults hook: swap the logical name for the hashed one
+    if endpoint == "static" and values.get("filename") in _assets:
+        values["filename"] = _assets[values["filename"]]["path"]
+
+
+def serve(filename):
+    """The static endpoint: hashed assets as immutable (precompressed) files, the rest as usual."""
+    if filename not in _hashed:
+        return current_app.send_static_file(filename)
+
+    accepted = request.accept_encodings
+    encoding, suffix = next(((name, suffix) for name, suffix in ENCODINGS
+                             if name in _hashed[filename] and accepted[name]), (None, ""))
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = send_from_directory(current_app.static_folder, filename + suffix, mimetype=mimetype,
+                                   max_age=MAX_AGE, conditional=True)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if _hashed[filename]:
+        response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    count = load(app.static_folder)
+    if count:
+        print(f"Static assets: {count} fingerprinted files")
+    app.url_defaults(_fingerprint)
+    app.view_functions["static"] = serve